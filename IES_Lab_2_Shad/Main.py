@@ -1,10 +1,13 @@
 import sys
-from PySide6.QtWidgets import (QApplication, QMainWindow, QMessageBox)
-from PySide6.QtCore import QRect, QTimer, Qt
-from PySide6.QtGui import QStandardItemModel, QStandardItem, QTransform, QPixmap
-from collections import deque
+from PySide6.QtWidgets import (QApplication, QFileDialog, QMainWindow, QMessageBox)
+from PySide6.QtCore import QRect, QThreadPool, QTimer, Qt
+from PySide6.QtGui import QStandardItemModel, QStandardItem, QTextCursor, QTransform, QPixmap
 
 from int2 import Ui_MainWindow
+from puzzle import log_row
+from solutions import get_cache
+from solver import Solver
+from workers import RaceWorker, SearchWorker
 
 
 class MainWindow(QMainWindow):
@@ -14,7 +17,9 @@ class MainWindow(QMainWindow):
         # Инициализация начального и конечного состояний
         self._start = [0, 0, 0, 0, 0, 0]  # человек, коза, капуста, волк 1, волк 2, собака
         self._goal = [1, 1, 1, 1, 1, 1]  # 0 - левый берег, 1 - правый берег
-        self.states = []  # Будет хранить последовательность состояний
+        self.states = []  # Будет хранить найденный путь (solver.StatePath)
+        self.steps = iter(())  # Шаги пути, которые анимация забирает по одному
+        self.solver = Solver(precompile=True, cache=get_cache(), instrument=True)  # Поиск решения (не зависит от Qt), граф строится один раз
 
         # Создание UI
         self.ui = Ui_MainWindow()
@@ -23,6 +28,19 @@ class MainWindow(QMainWindow):
         # Подключение сигналов
         self.ui.pushButton.clicked.connect(self.button_clicked_bfs)
         self.ui.pushButton2.clicked.connect(self.button_clicked_dfs)
+        self.ui.pushButton3.clicked.connect(self.button_clicked_bidirectional)
+        self.ui.pushButton4.clicked.connect(self.button_clicked_astar)
+        self.ui.pushButton5.clicked.connect(self.button_clicked_idastar)
+        self.ui.pushButton6.clicked.connect(self.button_clicked_cancel)
+        self.ui.pushButton7.clicked.connect(self.button_clicked_race)
+        self.ui.pushButton8.clicked.connect(self.button_clicked_export_stats)
+
+        # Поиск идёт в пуле потоков; кнопки поиска блокируются, пока он не закончится
+        self.pool = QThreadPool.globalInstance()
+        self.worker = None
+        self.search_buttons = [self.ui.pushButton, self.ui.pushButton2, self.ui.pushButton3,
+                               self.ui.pushButton4, self.ui.pushButton5, self.ui.pushButton7]
+        self.set_searching(False)
 
         # Таймер для последовательного перемещения
         self.timer = QTimer()
@@ -46,9 +64,9 @@ class MainWindow(QMainWindow):
         try:
             # Таблица Start
             start_model = QStandardItemModel()
-            start_model.setHorizontalHeaderLabels(['Ч', 'Ко', 'Ка', 'В1', 'В2', 'Сб'])
+            start_model.setHorizontalHeaderLabels(self.solver.puzzle.actors)
 
-            for col in range(6):
+            for col in range(self.solver.size):
                 item = QStandardItem('Л' if self._start[col] == 0 else 'П')
                 start_model.setItem(0, col, item)
 
@@ -57,9 +75,9 @@ class MainWindow(QMainWindow):
 
             # Таблица Goal
             goal_model = QStandardItemModel()
-            goal_model.setHorizontalHeaderLabels(['Ч', 'Ко', 'Ка', 'В1', 'В2', 'Сб'])
+            goal_model.setHorizontalHeaderLabels(self.solver.puzzle.actors)
 
-            for col in range(6):
+            for col in range(self.solver.size):
                 item = QStandardItem('Л' if self._goal[col] == 0 else 'П')
                 goal_model.setItem(0, col, item)
 
@@ -91,231 +109,141 @@ class MainWindow(QMainWindow):
             self.show_error(f"Ошибка при изменении состояния: {str(e)}")
 
     def button_clicked_bfs(self):
-        """Обработчик нажатия кнопки - запускает поиск решения и анимацию"""
-        try:
-            if not self.is_valid_state(self._start):
-                self.show_error("Начальное состояние недопустимо!")
-                return
-            if not self.is_valid_state(self._goal):
-                self.show_error("Конечное состояние недопустимо!")
-                return
+        """Обработчик нажатия кнопки - поиск в ширину"""
+        self.start_solution("bfs")
 
-            self.search_bfs()  # Находим решение
-            if not self.states:
-                self.show_error("Не удалось найти решение!")
-                return
+    def button_clicked_dfs(self):
+        """Обработчик нажатия кнопки - поиск в глубину"""
+        self.start_solution("dfs")
+
+    def button_clicked_bidirectional(self):
+        """Обработчик нажатия кнопки - двунаправленный поиск в ширину"""
+        self.start_solution("bidirectional")
+
+    def button_clicked_astar(self):
+        """Обработчик нажатия кнопки - поиск A*"""
+        self.start_solution("astar")
+
+    def button_clicked_idastar(self):
+        """Обработчик нажатия кнопки - поиск IDA*"""
+        self.start_solution("idastar")
+
+    def button_clicked_race(self):
+        """Обработчик нажатия кнопки - гонка нескольких стратегий в разных процессах"""
+        self.start_solution("race")
+
+    def button_clicked_export_stats(self):
+        """Обработчик нажатия кнопки - сохранение счётчиков последнего поиска в JSON"""
+        if self.solver.stats is None:
+            self.show_error("Счётчиков пока нет: сначала выполните поиск")
+            return
+        filename, _ = QFileDialog.getSaveFileName(self, "Сохранить счётчики поиска", "stats.json",
+                                                  "JSON (*.json)")
+        if not filename:
+            return
+        try:
+            self.solver.stats.save(filename)
+        except OSError as e:
+            self.show_error(f"Не удалось сохранить счётчики: {str(e)}")
 
-            self.current_state_index = 0
-            self.timer.start(500)  # 500 ms = 0.5 секунды
-            self.ui.textEdit.setText('Человек\tКоза\tКапуста\tВолк1\tВолк2\tСобака\n\n')
-        except Exception as e:
-            self.show_error(f"Ошибка при запуске решения: {str(e)}")
+    def button_clicked_cancel(self):
+        """Обработчик нажатия кнопки - отмена текущего поиска"""
+        if self.worker is not None:
+            self.worker.cancel()
 
-    def button_clicked_dfs(self):
-        """Обработчик нажатия кнопки - запускает поиск решения и анимацию"""
+    def start_solution(self, strategy):
+        """Запускает поиск решения выбранной стратегией (solver.STRATEGIES или "race") в фоновом потоке"""
         try:
-            if not self.is_valid_state(self._start):
+            if self.worker is not None:
+                return  # Предыдущий поиск ещё идёт
+            if not self.solver.is_valid_state(self._start):
                 self.show_error("Начальное состояние недопустимо!")
                 return
-            if not self.is_valid_state(self._goal):
+            if not self.solver.is_valid_state(self._goal):
                 self.show_error("Конечное состояние недопустимо!")
                 return
 
-            self.search_dfs()  # Находим решение
-            if not self.states:
-                self.show_error("Не удалось найти решение!")
-                return
+            self.timer.stop()
+            if strategy == "race":
+                self.worker = RaceWorker(self.solver, self._start, self._goal,
+                                         optimal=self.ui.checkBox.isChecked())
+            else:
+                self.worker = SearchWorker(self.solver, strategy, self._start, self._goal)
+            self.worker.signals.progress.connect(self.search_progress)
+            self.worker.signals.finished.connect(self.search_finished)
+            self.worker.signals.failed.connect(self.search_failed)
+            self.worker.signals.cancelled.connect(self.search_cancelled)
+            self.set_searching(True)
+            self.ui.statusbar.showMessage("Поиск решения...")
+            self.pool.start(self.worker)
+        except Exception as e:
+            self.worker = None
+            self.set_searching(False)
+            self.show_error(f"Ошибка при запуске решения: {str(e)}")
 
-            self.current_state_index = 0
+    def set_searching(self, searching):
+        """Блокирует кнопки поиска, пока идёт поиск, и разрешает отмену"""
+        for button in self.search_buttons:
+            button.setEnabled(not searching)
+        self.ui.pushButton6.setEnabled(searching)
+
+    def search_progress(self, expanded, frontier):
+        """Показывает ход поиска в строке состояния"""
+        self.ui.statusbar.showMessage(f"Раскрыто состояний: {expanded}, фронт: {frontier}")
+
+    def search_finished(self, states):
+        """Получает найденный путь из фонового потока и запускает анимацию"""
+        message = f"Кеш решений: попаданий {self.solver.memo_hits}, промахов {self.solver.memo_misses}"
+        if self.worker.strategy == "race":
+            message = f"Первой закончила стратегия: {self.worker.winner}. {message}"
+        elif self.solver.stats is not None:
+            message = f"{self.solver.stats.summary()}. {message}"
+        self.ui.statusbar.showMessage(message)
+        self.worker = None
+        self.set_searching(False)
+        self.states = states
+        if not self.states:
+            self.show_error("Не удалось найти решение!")
+            return
+        try:
+            self.steps = iter(self.states)  # Состояния раскодируются по мере показа
             self.timer.start(500)  # 500 ms = 0.5 секунды
             self.ui.textEdit.setText('Человек\tКоза\tКапуста\tВолк1\tВолк2\tСобака\n\n')
+            self.start_log()
         except Exception as e:
             self.show_error(f"Ошибка при запуске решения: {str(e)}")
 
+    def search_failed(self, message):
+        """Сообщает об ошибке, возникшей в фоновом поиске"""
+        self.worker = None
+        self.set_searching(False)
+        self.ui.statusbar.clearMessage()
+        self.states = []
+        self.show_error(f"Ошибка при поиске решения: {message}")
+
+    def search_cancelled(self):
+        """Поиск остановлен кнопкой отмены"""
+        self.worker = None
+        self.set_searching(False)
+        self.ui.statusbar.showMessage("Поиск отменён")
+
     def update_position(self):
         """Обновляет позиции объектов на форме"""
         try:
-            if self.current_state_index < len(self.states):
-                state = self.states[self.current_state_index]
-                nameState = []
-                for i in state:
-                    if i == 0:
-                        nameState.append("Левый")
-                    else:
-                        nameState.append("Правый")
-
-                # Добавляем текущее состояние в текстовое поле
-                curTxt = self.ui.textEdit.toPlainText()
-                newTxt = curTxt + "\t".join(nameState) + "\n"
-                self.ui.textEdit.setText(newTxt)
-
-                self.current_state_index += 1
+            state = next(self.steps, None)
+            if state is not None:
+                # Дописываем строку в конец журнала, не перерисовывая весь текст
+                self.log_cursor.insertText(log_row(state))
             else:
                 self.timer.stop()
         except Exception as e:
             self.show_error(f"Ошибка при обновлении позиций: {str(e)}")
             self.timer.stop()
 
-    def is_valid_state(self, state):
-        """Проверяет, является ли состояние допустимым"""
-        forbidden = [
-            (1, 2), (1, 3), (1, 4), (3, 5), (4, 5)  # Добавьте все необходимые
-        ]
-        for (a, b) in forbidden:
-            if state[a] == state[b] and state[0] != state[a]:
-                return False
-        return True
-
-    def can_transport_together(self, item1, item2):
-        """Проверяет, можно ли перевозить два предмета вместе"""
-        forbidden_pairs = [
-            (1, 2),  # Коза + капуста
-            (1, 3),  # Коза + волк1
-            (1, 4),  # Коза + волк2
-            (3, 5),  # Волк1 + собака
-            (4, 5)  # Волк2 + собака
-        ]
-        pair = tuple(sorted((item1, item2)))
-        return pair not in forbidden_pairs
-
-    def generate_next_states(self, current_state):
-        """Генерирует все возможные следующие допустимые состояния (можно перевозить до 2 объектов)"""
-        try:
-            next_states = []
-            man_pos = current_state[0]  # Текущее положение человека
-
-            # Все возможные комбинации предметов для перевозки (один или два)
-            items_to_move = []
-
-            # Добавляем варианты с одним предметом
-            for item in [1, 2, 3, 4, 5]:  # Индексы предметов (коза, капуста, волк1, волк2, собака)
-                if current_state[item] == man_pos:  # Предмет на том же берегу, что и человек
-                    items_to_move.append([item])
-
-            # Добавляем варианты с двумя предметами
-            for i in range(len(items_to_move)):
-                for j in range(i + 1, len(items_to_move)):
-                    item1 = items_to_move[i][0]
-                    item2 = items_to_move[j][0]
-                    if self.can_transport_together(item1, item2):  # Добавьте эту проверку
-                        items_to_move.append([item1, item2])
-
-            # Добавляем вариант, когда человек переезжает один
-            items_to_move.append([])
-
-            # Генерируем новые состояния для каждого варианта перевозки
-            for items in items_to_move:
-                new_state = current_state.copy()
-                new_state[0] = 1 - man_pos  # Человек переезжает
-
-                for item in items:
-                    new_state[item] = 1 - man_pos  # Предмет перевозится
-
-                if self.is_valid_state(new_state):
-                    next_states.append(new_state)
-
-            return next_states
-        except Exception as e:
-            self.show_error(f"Ошибка при генерации состояний: {str(e)}")
-            return []
-
-    def search_bfs(self):
-        """Реализация поиска в ширину (BFS)"""
-        try:
-
-            visited = set()
-            queue = deque()
-            parent = {}
-
-            # Преобразуем списки в кортежи для хранения в множестве
-            start_tuple = tuple(self._start)
-            goal_tuple = tuple(self._goal)
-
-            queue.append(start_tuple)
-            visited.add(start_tuple)
-            parent[start_tuple] = None
-
-            found = False
-            current_tuple = None
-
-            while queue:
-                current_tuple = queue.popleft()
-
-                if current_tuple == goal_tuple:
-                    found = True
-                    break
-
-                # Генерируем следующие состояния
-                next_states = self.generate_next_states(list(current_tuple))
-                for state in next_states:
-                    state_tuple = tuple(state)
-                    if state_tuple not in visited:
-                        visited.add(state_tuple)
-                        parent[state_tuple] = current_tuple
-                        queue.append(state_tuple)
-
-
-            # Восстанавливаем путь
-            self.states = []
-            if found:
-                path = []
-                current_tuple = goal_tuple
-                while current_tuple is not None:
-                    path.append(list(current_tuple))
-                    current_tuple = parent[current_tuple]
-                self.states = path[::-1]  # Разворачиваем путь, чтобы получить от начала до конца
-        except Exception as e:
-            self.show_error(f"Ошибка при поиске решения: {str(e)}")
-            self.states = []
-
-
-    def search_dfs(self):
-        """Реализация поиска в ширину (BFS)"""
-        try:
-            visited = set()
-            queue = deque()
-            parent = {}
-
-            # Преобразуем списки в кортежи для хранения в множестве
-            start_tuple = tuple(self._start)
-            goal_tuple = tuple(self._goal)
-
-            queue.append(start_tuple)
-            visited.add(start_tuple)
-            parent[start_tuple] = None
-
-            found = False
-            current_tuple = None
-
-            while queue:
-                current_tuple = queue.pop()
-
-                if current_tuple == goal_tuple:
-                    found = True
-                    break
-
-                # Генерируем следующие состояния
-                next_states = self.generate_next_states(list(current_tuple))
-                for state in next_states:
-                    state_tuple = tuple(state)
-                    if state_tuple not in visited:
-                        visited.add(state_tuple)
-                        parent[state_tuple] = current_tuple
-                        queue.append(state_tuple)
-
-
-            # Восстанавливаем путь
-            self.states = []
-            if found:
-                path = []
-                current_tuple = goal_tuple
-                while current_tuple is not None:
-                    path.append(list(current_tuple))
-                    current_tuple = parent[current_tuple]
-                self.states = path[::-1]  # Разворачиваем путь, чтобы получить от начала до конца
-        except Exception as e:
-            self.show_error(f"Ошибка при поиске решения: {str(e)}")
-            self.states = []
+    def start_log(self):
+        """Готовит курсор в конце текста, куда дописываются строки журнала"""
+        self.log_cursor = QTextCursor(self.ui.textEdit.document())
+        self.log_cursor.movePosition(QTextCursor.MoveOperation.End)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -0,0 +1,223 @@
+"""Пакетное решение множества пар начало/цель без окна
+
+Пример: python batch.py pairs.jsonl -o solutions.jsonl --strategy bfs
+
+Входной файл - JSONL (по объекту на строку) или CSV с заголовком.
+Обязательные поля: start и goal - состояние строкой "010011" или
+списком [0, 1, 0, 0, 1, 1]. Необязательные: strategy и правила задачи
+(actors, conflicts, capacity, rowers); в CSV списки пишутся через
+пробел: actors - "Ч Ко Ка В1 В2 Сб", rowers - "0" или "Ч", conflicts -
+"1-2 1-3" или "Ко-Ка Ко-В1". Вместо файла можно указать --all-pairs:
+тогда решаются все пары начало/цель задачи по умолчанию.
+
+Результаты пишутся в JSONL в порядке входных строк по мере готовности.
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from parallel import get_solver
+from puzzle import DEFAULT_PUZZLE, Puzzle
+from solutions import get_cache
+
+
+# Сколько пар отдаётся процессу за раз
+CHUNK_SIZE = 256
+
+# Сколько порций на процесс может быть в работе одновременно (ограничивает память)
+CHUNKS_PER_WORKER = 2
+
+
+def parse_state(value, solver):
+    """Состояние из строки "0101..." или списка 0/1
+
+    Если гребцов несколько, можно добавить последним знаком берег лодки
+    (без него лодка считается на левом берегу).
+    """
+    if isinstance(value, str):
+        value = [int(ch) for ch in value.strip()]
+    state = [int(bank) for bank in value]
+    if len(state) not in (solver.size, solver.nbits) or any(bank not in (0, 1) for bank in state):
+        raise ValueError(f"Недопустимое состояние: {value}")
+    return state
+
+
+def format_state(state):
+    """Состояние в виде строки "0101..." """
+    return "".join(str(bank) for bank in state)
+
+
+def parse_actor(text):
+    """Объект из CSV: номер или имя"""
+    return int(text) if text.isdigit() else text
+
+
+def parse_conflicts(text):
+    """Конфликты из строки CSV вида "1-2 1-3" (номера или имена объектов)"""
+    conflicts = []
+    for item in text.split():
+        a, b = item.split("-")
+        conflicts.append((parse_actor(a), parse_actor(b)))
+    return conflicts
+
+
+def puzzle_for(item, default):
+    """Задача для строки входа: правила по умолчанию, переопределённые полями строки"""
+    if not any(item.get(field) not in (None, "") for field in ("actors", "conflicts", "capacity", "rowers")):
+        return default
+    conflicts = item.get("conflicts")
+    if conflicts in (None, ""):
+        conflicts = default.conflicts
+    elif isinstance(conflicts, str):
+        conflicts = parse_conflicts(conflicts)
+    actors = item.get("actors") or default.actors
+    if isinstance(actors, str):
+        actors = actors.split()
+    rowers = item.get("rowers")
+    if rowers in (None, ""):
+        rowers = default.rowers
+    elif isinstance(rowers, str):
+        rowers = [parse_actor(rower) for rower in rowers.split()]
+    capacity = item.get("capacity")
+    return Puzzle(actors, conflicts, default.capacity if capacity in (None, "") else int(capacity),
+                  rowers)
+
+
+def read_items(filename):
+    """Строки входного файла по одной (файл целиком в память не читается)"""
+    if filename == "-":
+        f = sys.stdin
+    else:
+        f = open(filename, encoding="utf-8", newline="")
+    try:
+        if filename.lower().endswith(".csv"):
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def all_pairs(puzzle):
+    """Все пары начало/цель задачи"""
+    states = [format_state(bits) for bits in itertools.product((0, 1), repeat=puzzle.size)]
+    for start in states:
+        for goal in states:
+            yield {"start": start, "goal": goal}
+
+
+def solve_chunk(chunk, default, strategy, precompile, symmetry, cache_file=None, stats=False,
+                bfs_workers=None):
+    """Решает порцию пар в процессе пула; ошибка в строке не останавливает остальные"""
+    results = []
+    for index, item in chunk:
+        result = {"index": index}
+        try:
+            puzzle = puzzle_for(item, default)
+            solver = get_solver(puzzle, precompile, symmetry)
+            solver.cache = get_cache(cache_file) if cache_file else None
+            solver.instrument = stats
+            solver.workers = bfs_workers
+            start = parse_state(item["start"], solver)
+            goal = parse_state(item["goal"], solver)
+            name = item.get("strategy") or strategy
+            path = solver.solve(name, start, goal)
+            result.update(start=format_state(start), goal=format_state(goal), strategy=name,
+                          length=len(path) - 1 if path else None,
+                          path=[format_state(state) for state in path])
+            if stats:
+                result["stats"] = solver.stats.to_dict()
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+        results.append(result)
+    return results
+
+
+def chunks(items, size):
+    """Нумерует строки и режет их на порции по size"""
+    numbered = enumerate(items)
+    while True:
+        chunk = list(itertools.islice(numbered, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_batch(items, out, default=DEFAULT_PUZZLE, strategy="bfs", workers=None,
+              chunk_size=CHUNK_SIZE, precompile=False, symmetry=False, cache_file=None, stats=False,
+              bfs_workers=None):
+    """Решает пары в пуле процессов и пишет результаты в out в исходном порядке
+
+    В работе одновременно не больше workers * CHUNKS_PER_WORKER порций,
+    поэтому память не зависит от длины входа. Возвращает (решено, ошибок).
+    """
+    workers = workers or os.cpu_count() or 1
+    solved = failed = 0
+    with ProcessPoolExecutor(workers) as pool:
+        running = deque()
+        for chunk in chunks(items, chunk_size):
+            running.append(pool.submit(solve_chunk, chunk, default, strategy, precompile, symmetry,
+                                       cache_file, stats, bfs_workers))
+            if len(running) < workers * CHUNKS_PER_WORKER:
+                continue
+            # Окно заполнено: дожидаемся самой старой порции, сохраняя порядок
+            solved, failed = _write(running.popleft().result(), out, solved, failed)
+        while running:
+            solved, failed = _write(running.popleft().result(), out, solved, failed)
+    return solved, failed
+
+
+def _write(results, out, solved, failed):
+    """Пишет результаты порции и обновляет счётчики"""
+    for result in results:
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        if "error" in result:
+            failed += 1
+        else:
+            solved += 1
+    return solved, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетное решение задачи о переправе")
+    parser.add_argument("input", nargs="?", help="JSONL или CSV с парами начало/цель ('-' - stdin)")
+    parser.add_argument("-o", "--output", default="-", help="файл результатов JSONL ('-' - stdout)")
+    parser.add_argument("--all-pairs", action="store_true", help="решить все пары начало/цель")
+    parser.add_argument("--strategy", default="bfs", help="стратегия по умолчанию (bfs, dfs, ...)")
+    parser.add_argument("--workers", type=int, default=None, help="число процессов")
+    parser.add_argument("--chunk", type=int, default=CHUNK_SIZE, help="пар в одной порции")
+    parser.add_argument("--precompile", action="store_true", help="строить граф и таблицу путей заранее")
+    parser.add_argument("--symmetry", action="store_true", help="склеивать одинаковые объекты")
+    parser.add_argument("--cache", metavar="FILE", help="файл SQLite с сохранёнными решениями")
+    parser.add_argument("--stats", action="store_true", help="добавить к каждому решению счётчики поиска")
+    parser.add_argument("--bfs-workers", type=int, default=None,
+                        help="процессов на одну пару для стратегии bfs_parallel")
+    args = parser.parse_args(argv)
+
+    if args.all_pairs == (args.input is not None):
+        parser.error("нужно указать либо входной файл, либо --all-pairs")
+    items = all_pairs(DEFAULT_PUZZLE) if args.all_pairs else read_items(args.input)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        solved, failed = run_batch(items, out, strategy=args.strategy, workers=args.workers,
+                                   chunk_size=args.chunk, precompile=args.precompile,
+                                   symmetry=args.symmetry, cache_file=args.cache, stats=args.stats,
+                                   bfs_workers=args.bfs_workers)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"Обработано: {solved}, ошибок: {failed}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,350 @@
+"""Замеры скорости решателя на лестнице задач разного размера
+
+Пример: python benchmark.py -o results.json --baseline baseline.json
+
+Для каждого размера задачи из лестницы (6 объектов стандартной задачи,
+затем сгенерированные задачи на 10, 16, 20 объектов с разной вместимостью
+лодки), каждой стратегии из STRATEGIES и каждого способа хранения
+(plain, precompile, symmetry) решается один и тот же набор пар
+начало/цель; кратчайший путь в каждой паре не короче MIN_DISTANCE
+переправ. Каждый случай считается в отдельном процессе, чтобы пик
+памяти (RSS) относился только к нему. Задачи и пары строятся из --seed,
+поэтому запуски повторяемы.
+
+Результаты пишутся в JSON: время подготовки, задержки (p50, p90, p99,
+max), решений и раскрытий в секунду, пик RSS. С --baseline результаты
+сравниваются с сохранённым файлом: ухудшение больше --tolerance
+считается регрессией, и код выхода становится 1.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+try:
+    import resource
+except ImportError:  # Windows: пик памяти не замеряется
+    resource = None
+
+from puzzle import DEFAULT_PUZZLE, Puzzle
+from solver import STRATEGIES, VALID_TABLE_MAX_BITS, SearchCancelled, Solver, np
+
+
+# Лестница задач: (объектов, вместимость лодки)
+LADDER = [(6, 2), (10, 2), (10, 3), (16, 2), (16, 4), (20, 3)]
+
+# Способы хранения: имя -> (precompile, symmetry)
+ENCODINGS = {
+    "plain": (False, False),
+    "precompile": (True, False),
+    "symmetry": (False, True),
+}
+
+# Пар начало/цель на случай и сколько из них прогоняется без замера (разогрев)
+QUERIES = 20
+WARMUP = 1
+
+# Длина случайного блуждания от начала к цели
+WALK_STEPS = 50
+
+# Пары ближе этого числа переправ (в том числе цель = начало) не берутся
+MIN_DISTANCE = 4
+
+# Сколько случайных начал пробуется на каждую нужную пару: при плотных
+# конфликтах допустимое состояние, из которого есть переправа, - редкость
+ATTEMPTS_PER_QUERY = 10000
+
+# Сколько секунд может занять одна пара; дольше - случай прерывается
+QUERY_TIMEOUT = 30.0
+
+# Допустимое ухудшение относительно базового замера
+TOLERANCE = 0.25
+
+# Разница задержек меньше этой (секунд) - шум таймера, а не регрессия
+MIN_LATENCY_DELTA = 0.001
+
+# Раскрытий в секунду сравниваются, только если поиск шёл хотя бы столько секунд
+MIN_TOTAL_TIME = 0.05
+
+# Версия формата файла результатов
+RESULTS_VERSION = 1
+
+
+def make_puzzle(size, capacity, seed):
+    """Задача на size объектов: гребец 0 и случайные конфликты остальных
+
+    Шесть объектов с вместимостью 2 - стандартная задача. Конфликтов
+    примерно столько же, сколько объектов: задача не распадается на
+    независимые части и при этом обычно решаема.
+    """
+    if (size, capacity) == (DEFAULT_PUZZLE.size, DEFAULT_PUZZLE.capacity):
+        return DEFAULT_PUZZLE
+    rng = random.Random(f"{seed}-{size}-{capacity}")
+    pairs = [(a, b) for a in range(1, size) for b in range(a + 1, size)]
+    conflicts = rng.sample(pairs, min(len(pairs), size - 1))
+    return Puzzle([f"О{i}" for i in range(size)], conflicts, capacity=capacity)
+
+
+def make_queries(solver, count, seed):
+    """count пар начало/цель, кратчайший путь в каждой не короче MIN_DISTANCE
+
+    Начало - случайное допустимое состояние, из которого есть переправа,
+    цель - конец случайного блуждания из него на WALK_STEPS переправ без
+    возвратов в пройденные состояния. Расстояние проверяется search_bfs,
+    близкие пары отбрасываются. Первые WARMUP пар - случайные (разогрев),
+    за ними идёт пара все слева -> все справа, если она так же далека:
+    у сгенерированных задач с плотными конфликтами она обычно
+    нерешаема, и тогда её нет.
+    """
+    rng = random.Random(f"{seed}-{solver.puzzle.key()}")
+
+    def far_enough(start, goal):
+        path = solver.search_bfs(start, goal)
+        return bool(path) and len(path) - 1 >= MIN_DISTANCE
+
+    classic = ([0] * solver.nbits, [1] * solver.nbits)
+    classic = [classic] if far_enough(*classic) else []
+    queries = []
+    for _ in range(ATTEMPTS_PER_QUERY * count):
+        start = rng.getrandbits(solver.nbits)
+        if not solver.is_valid_code(start) or not solver.next_codes(start):
+            continue
+        goal = start
+        walked = {start}
+        for _ in range(WALK_STEPS):
+            neighbors = [code for code in solver.next_codes(goal) if code not in walked]
+            if not neighbors:
+                break
+            goal = rng.choice(neighbors)
+            walked.add(goal)
+        pair = tuple([(code >> i) & 1 for i in range(solver.nbits)] for code in (start, goal))
+        if far_enough(*pair):
+            queries.append(pair)
+            if len(queries) + len(classic) >= count:
+                return queries[:WARMUP] + classic + queries[WARMUP:]
+    raise ValueError(f"Не удалось подобрать {count} пар не ближе {MIN_DISTANCE} переправ")
+
+
+def percentile(values, p):
+    """Перцентиль p (0-100) по ближайшему рангу"""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def peak_rss():
+    """Пик памяти процесса в КБ (None, если замерить нельзя)
+
+    Учитываются и завершившиеся дочерние процессы (bfs_parallel): берётся
+    наибольший пик - свой или самого большого из них.
+    """
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return peak // 1024 if sys.platform == "darwin" else peak  # На macOS - в байтах
+
+
+def run_case(size, capacity, strategy, encoding, pairs, seed, timeout, bfs_workers=None):
+    """Один случай в отдельном процессе: подготовка решателя и все пары (первые WARMUP - разогрев)"""
+    result = {"case": case_name(size, capacity, strategy, encoding), "size": size,
+              "capacity": capacity, "strategy": strategy, "encoding": encoding}
+    if strategy == "bfs_parallel":
+        result["workers"] = bfs_workers or os.cpu_count() or 1
+    precompile, symmetry = ENCODINGS[encoding]
+    if precompile and size > VALID_TABLE_MAX_BITS:
+        result["skipped"] = "слишком много объектов для полного графа"
+        return result
+
+    puzzle = make_puzzle(size, capacity, seed)
+    started = time.perf_counter()
+    solver = Solver(puzzle, precompile, symmetry, instrument=True, workers=bfs_workers)
+    result["setup"] = round(time.perf_counter() - started, 6)
+    result["rss_setup_kb"] = peak_rss()
+
+    deadline = 0.0
+
+    def progress(expanded, frontier):
+        if time.perf_counter() > deadline:
+            raise SearchCancelled()
+
+    latencies = []
+    lengths = []
+    expanded = 0
+    for number, (start, goal) in enumerate(pairs):
+        solver.memo.clear()  # Замеряем поиск, а не память решений
+        started = time.perf_counter()
+        deadline = started + timeout
+        try:
+            path = solver.solve(strategy, start, goal, progress)
+        except SearchCancelled:
+            result["timeout"] = timeout
+            break
+        elapsed = time.perf_counter() - started
+        if number < WARMUP:
+            continue
+        latencies.append(elapsed)
+        lengths.append(len(path) - 1 if path else None)
+        expanded += solver.stats.expanded
+
+    result["queries"] = len(latencies)
+    result["peak_rss_kb"] = peak_rss()
+    if latencies:
+        total = sum(latencies)
+        result["latency"] = {"mean": round(total / len(latencies), 6),
+                             **{f"p{p}": round(percentile(latencies, p), 6) for p in (50, 90, 99)},
+                             "max": round(max(latencies), 6)}
+        result["total"] = round(total, 6)
+        result["queries_per_second"] = round(len(latencies) / total, 3) if total else None
+        # Ответы из таблицы путей (precompile) ничего не раскрывают
+        result["expanded_per_second"] = round(expanded / total) if total and expanded else None
+        result["lengths"] = lengths
+    return result
+
+
+def case_name(size, capacity, strategy, encoding):
+    return f"n{size}-c{capacity}/{strategy}/{encoding}"
+
+
+def run_benchmark(ladder=LADDER, strategies=tuple(STRATEGIES), encodings=("plain",),
+                  queries=QUERIES, seed=0, timeout=QUERY_TIMEOUT, bfs_workers=None, report=None):
+    """Прогоняет все случаи по очереди, каждый в новом процессе; возвращает словарь результатов"""
+    cases = []
+    # Один процесс на случай и не больше одного случая сразу: замеры не мешают друг другу
+    with ProcessPoolExecutor(1, mp_context=get_context("spawn"), max_tasks_per_child=1) as pool:
+        for size, capacity in ladder:
+            # Пары подбираются здесь, один раз на задачу: проверка расстояний не
+            # попадает в пик памяти случаев
+            pairs = make_queries(Solver(make_puzzle(size, capacity, seed)), queries + WARMUP, seed)
+            for strategy in strategies:
+                for encoding in encodings:
+                    case = pool.submit(run_case, size, capacity, strategy, encoding,
+                                       pairs, seed, timeout, bfs_workers).result()
+                    cases.append(case)
+                    if report is not None:
+                        report(case)
+    return {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "processor": platform.processor(), "cpus": os.cpu_count(),
+                    "numpy": np.__version__ if np is not None else None},
+        "settings": {"queries": queries, "warmup": WARMUP, "min_distance": MIN_DISTANCE, "seed": seed,
+                     "timeout": timeout, "bfs_workers": bfs_workers},
+        "cases": cases,
+    }
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Регрессии относительно базового замера: список строк с описанием"""
+    old_cases = {case["case"]: case for case in baseline.get("cases", [])}
+    regressions = []
+    for case in results["cases"]:
+        old = old_cases.get(case["case"])
+        if old is None or "skipped" in case:
+            continue
+        name = case["case"]
+        if "timeout" in case and "timeout" not in old:
+            regressions.append(f"{name}: превышено время ({case['timeout']} с на пару)")
+            continue
+        if "latency" not in case or "latency" not in old:
+            continue
+        for p in ("p50", "p90"):
+            now, before = case["latency"][p], old["latency"][p]
+            if now > before * (1 + tolerance) and now - before > MIN_LATENCY_DELTA:
+                regressions.append(f"{name}: задержка {p} {before * 1000:.2f} -> {now * 1000:.2f} мс")
+        now, before = case.get("expanded_per_second"), old.get("expanded_per_second")
+        measured = min(case["total"], old["total"]) >= MIN_TOTAL_TIME
+        if measured and now is not None and before and now < before / (1 + tolerance):
+            regressions.append(f"{name}: раскрытий в секунду {before} -> {now}")
+        now, before = case.get("peak_rss_kb"), old.get("peak_rss_kb")
+        if now is not None and before and now > before * (1 + tolerance):
+            regressions.append(f"{name}: пик памяти {before} -> {now} КБ")
+        if (STRATEGIES[case["strategy"]] != "search_dfs" and case.get("lengths") != old.get("lengths")
+                and case["queries"] == old["queries"]):
+            regressions.append(f"{name}: изменились длины путей")
+    return regressions
+
+
+def format_case(case):
+    """Строка отчёта о случае"""
+    if "skipped" in case:
+        return f"{case['case']}: пропущен ({case['skipped']})"
+    parts = [f"{case['case']}: подготовка {case['setup'] * 1000:.1f} мс"]
+    if "latency" in case:
+        latency = case["latency"]
+        parts.append(f"p50 {latency['p50'] * 1000:.2f} мс, p90 {latency['p90'] * 1000:.2f} мс, "
+                     f"p99 {latency['p99'] * 1000:.2f} мс")
+        if case["expanded_per_second"] is not None:
+            parts.append(f"раскрытий/с {case['expanded_per_second']}")
+    if case.get("peak_rss_kb") is not None:
+        parts.append(f"RSS {case['peak_rss_kb'] / 1024:.1f} МБ")
+    if "timeout" in case:
+        parts.append(f"прерван после {case['queries']} пар")
+    return ", ".join(parts)
+
+
+def parse_ladder(text):
+    """Лестница из строки вида "6x2 10x2 16x4" """
+    ladder = []
+    for item in text.replace(",", " ").split():
+        size, _, capacity = item.partition("x")
+        ladder.append((int(size), int(capacity or 2)))
+    return ladder
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры скорости решателя задачи о переправе")
+    parser.add_argument("-o", "--output", default="benchmark.json", help="файл результатов JSON")
+    parser.add_argument("--baseline", metavar="FILE", help="базовый замер для сравнения")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="записать результаты в файл --baseline вместо сравнения")
+    parser.add_argument("--ladder", type=parse_ladder, default=LADDER,
+                        help='размеры задач, например "6x2 10x3 20x3" (объектов x вместимость)')
+    parser.add_argument("--strategy", action="append", choices=list(STRATEGIES),
+                        help="стратегия (можно несколько раз; по умолчанию все)")
+    parser.add_argument("--encoding", action="append", choices=list(ENCODINGS),
+                        help="способ хранения (можно несколько раз; по умолчанию plain)")
+    parser.add_argument("--queries", type=int, default=QUERIES, help="пар начало/цель на случай")
+    parser.add_argument("--seed", type=int, default=0, help="зерно генератора задач и пар")
+    parser.add_argument("--timeout", type=float, default=QUERY_TIMEOUT, help="секунд на одну пару")
+    parser.add_argument("--bfs-workers", type=int, default=None,
+                        help="процессов для bfs_parallel (по умолчанию по числу ядер)")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="допустимое ухудшение (0.25 - на 25%%)")
+    args = parser.parse_args(argv)
+    if args.update_baseline and not args.baseline:
+        parser.error("--update-baseline требует --baseline")
+
+    results = run_benchmark(args.ladder, args.strategy or tuple(STRATEGIES), args.encoding or ("plain",),
+                            args.queries, args.seed, args.timeout, args.bfs_workers,
+                            report=lambda case: print(format_case(case), file=sys.stderr))
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if not args.baseline:
+        return 0
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Базовый замер сохранён в {args.baseline}", file=sys.stderr)
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("settings") != results["settings"]:
+        print("Внимание: базовый замер снят с другими настройками", file=sys.stderr)
+    regressions = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        print(f"РЕГРЕССИЯ {line}", file=sys.stderr)
+    print(f"Регрессий: {len(regressions)}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+import heapq
+import mmap
+import os
+import tempfile
+from array import array
+from bisect import bisect_left
+
+
+# Сколько кодов соседей сортируется в памяти, прежде чем уйти на диск отдельным куском
+RUN_SIZE = 1 << 20
+
+# Размер буфера записи (в кодах)
+WRITE_BUFFER = 1 << 16
+
+
+def _read_codes(filename):
+    """Коды из файла по порядку; файл отображается в память (mmap) и читается подряд"""
+    if os.path.getsize(filename) == 0:
+        return
+    with open(filename, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        view = memoryview(mm).cast('Q')
+        try:
+            yield from view
+        finally:
+            view.release()
+
+
+class _CodeWriter:
+    """Последовательная запись кодов в файл через буфер"""
+
+    def __init__(self, filename):
+        self.file = open(filename, "wb")
+        self.buffer = array('Q')
+        self.count = 0
+
+    def write(self, code):
+        self.buffer.append(code)
+        if len(self.buffer) >= WRITE_BUFFER:
+            self.flush()
+
+    def flush(self):
+        self.count += len(self.buffer)
+        self.buffer.tofile(self.file)
+        del self.buffer[:]
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class _SortedFile:
+    """Отсортированный файл кодов в памяти (mmap) с проверкой вхождения двоичным поиском"""
+
+    def __init__(self, filename):
+        self.file = open(filename, "rb")
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.mm).cast('Q')
+
+    def __contains__(self, code):
+        i = bisect_left(self.view, code)
+        return i < len(self.view) and self.view[i] == code
+
+    def close(self):
+        self.view.release()
+        self.mm.close()
+        self.file.close()
+
+
+def _write_run(filename, codes):
+    """Сортирует кусок соседей, убирает повторы и пишет его на диск"""
+    with open(filename, "wb") as f:
+        array('Q', sorted(set(codes))).tofile(f)
+    return filename
+
+
+def external_bfs(start_code, goal_code, next_codes, progress=None, interval=1024, workdir=None,
+                 record=None):
+    """Поиск в ширину, которому хватает памяти на один кусок соседей
+
+    Каждый слой BFS - отсортированный файл кодов. Соседи слоя собираются
+    кусками по RUN_SIZE, каждый кусок сортируется и пишется на диск, затем
+    куски сливаются; повторы и состояния двух предыдущих слоёв (между
+    допустимыми состояниями переправы обратимы, так что дальше соседи
+    не уходят) отбрасываются тем же проходом слияния. Родители не
+    хранятся: после того как цель найдена, путь восстанавливается обратным
+    проходом - в каждом предыдущем слое ищется сосед текущего состояния.
+    Весь ввод-вывод последовательный, кроме двоичного поиска по слою в
+    обратном проходе. progress(раскрыто, соседей в памяти) вызывается
+    каждые interval раскрытых состояний. Файлы лежат во временной папке
+    (workdir или TMPDIR) и удаляются по окончании. record(раскрыто,
+    соседей, посещено, пик фронта) вызывается один раз по окончании
+    обхода (Solver.record).
+
+    Возвращает список кодов пути (пустой, если пути нет); путь кратчайший,
+    но среди равных по длине может отличаться от Solver.search_bfs.
+    """
+    if start_code == goal_code:
+        return [start_code]
+
+    with tempfile.TemporaryDirectory(prefix="bfs-", dir=workdir) as folder:
+        layers = [os.path.join(folder, "layer-0.bin")]
+        with open(layers[0], "wb") as f:
+            array('Q', [start_code]).tofile(f)
+        expanded = 0
+        generated = 0
+        visited = 1
+        peak = 1
+        found = False
+
+        while not found:
+            # Соседи слоя - отсортированными кусками на диск
+            runs = []
+            buffer = []
+            for code in _read_codes(layers[-1]):
+                neighbors = next_codes(code)
+                generated += len(neighbors)
+                buffer.extend(neighbors)
+                expanded += 1
+                if progress is not None and expanded % interval == 0:
+                    progress(expanded, len(buffer))
+                if len(buffer) >= RUN_SIZE:
+                    runs.append(_write_run(os.path.join(folder, f"run-{len(runs)}.bin"), buffer))
+                    buffer = []
+            if buffer:
+                runs.append(_write_run(os.path.join(folder, f"run-{len(runs)}.bin"), buffer))
+
+            # Слияние кусков без повторов и без состояний двух предыдущих слоёв
+            layer = os.path.join(folder, f"layer-{len(layers)}.bin")
+            writer = _CodeWriter(layer)
+            seen = heapq.merge(*(_read_codes(name) for name in layers[-2:]))
+            old = next(seen, None)
+            last = None
+            for code in heapq.merge(*(_read_codes(name) for name in runs)):
+                if code == last:
+                    continue
+                last = code
+                while old is not None and old < code:
+                    old = next(seen, None)
+                if code == old:
+                    continue
+                writer.write(code)
+                if code == goal_code:
+                    found = True
+            writer.close()
+            for name in runs:
+                os.remove(name)
+            visited += writer.count
+            peak = max(peak, writer.count)
+            if writer.count == 0:
+                break
+            layers.append(layer)
+        if record is not None:
+            record(expanded, generated, visited, peak)
+        if not found:
+            return []
+
+        # Обратный проход: родитель - сосед в предыдущем слое (переправы обратимы)
+        path = [goal_code]
+        for depth in range(len(layers) - 2, 0, -1):
+            current = path[-1]
+            previous = _SortedFile(layers[depth])
+            try:
+                parent = next(code for code in next_codes(current)
+                              if code in previous and current in next_codes(code))
+            finally:
+                previous.close()
+            path.append(parent)
+        path.append(start_code)
+        path.reverse()
+        return path
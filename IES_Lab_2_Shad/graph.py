@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+from array import array
+from collections import deque
+
+
+# Построенные графы и таблицы путей по ключу набора правил (Solver.rules_key())
+_graphs = {}
+_tables = {}
+
+# Папка для таблиц, сохраняемых между запусками
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+
+# Версия формата файла таблицы путей
+TABLE_VERSION = 1
+
+# Расстояние до недостижимого состояния
+UNREACHABLE = 0xFFFF
+
+
+class StateGraph:
+    """Полный граф переходов задачи, построенный один раз для набора правил
+
+    Хранится в виде CSR: соседи состояния code лежат в
+    targets[offsets[code]:offsets[code + 1]] в том же порядке,
+    в котором их выдаёт Solver.next_codes. Переходы есть и у недопустимых
+    состояний, чтобы поиск из них давал тот же результат, что и без графа.
+    """
+
+    def __init__(self, solver):
+        count = 1 << solver.nbits
+        offsets = array('I', [0]) * (count + 1)
+        targets = array('I')
+        for code in range(count):
+            targets.extend(solver.next_codes(code))
+            offsets[code + 1] = len(targets)
+
+        self.nbits = solver.nbits
+        self.valid = bytes(solver.valid[code] for code in range(count))
+        self.offsets = offsets
+        self.targets = targets
+        self.components = self._label_components()
+
+    def neighbors(self, code):
+        """Соседи состояния (срез массива targets)"""
+        return self.targets[self.offsets[code]:self.offsets[code + 1]]
+
+    def _label_components(self):
+        """Номер компоненты связности для каждого состояния
+
+        Между допустимыми состояниями переправы обратимы, поэтому граф на них
+        неориентированный; недопустимое состояние - отдельная компонента.
+        """
+        offsets = self.offsets
+        targets = self.targets
+        components = array('I', [0]) * (len(offsets) - 1)
+        label = 0
+        for root in range(len(components)):
+            if components[root]:
+                continue
+            label += 1
+            components[root] = label
+            if not self.valid[root]:
+                continue
+            queue = deque([root])
+            while queue:
+                current = queue.popleft()
+                for i in range(offsets[current], offsets[current + 1]):
+                    code = targets[i]
+                    if not components[code]:
+                        components[code] = label
+                        queue.append(code)
+        return components
+
+    def reachable(self, start_code, goal_code):
+        """Можно ли из start_code попасть в goal_code"""
+        components = self.components
+        if start_code == goal_code or components[start_code] == components[goal_code]:
+            return True
+        if self.valid[start_code]:
+            return False
+        # Из недопустимого состояния можно уйти только в его соседей
+        return any(components[code] == components[goal_code] for code in self.neighbors(start_code))
+
+
+def get_graph(solver):
+    """Возвращает граф для правил решателя, строит его только при первом обращении"""
+    key = solver.rules_key()
+    graph = _graphs.get(key)
+    if graph is None:
+        graph = _graphs[key] = StateGraph(solver)
+    return graph
+
+
+class PathTable:
+    """Таблица кратчайших путей между всеми парами состояний
+
+    Для каждого начального состояния хранится дерево поиска в ширину
+    по графу: prev[start * count + code] - предыдущее состояние на пути,
+    dist[start * count + code] - число переправ. Путь восстанавливается
+    за O(длины пути) и совпадает с тем, что выдаёт Solver.search_bfs.
+    """
+
+    def __init__(self, count, dist, prev):
+        self.count = count
+        self.dist = dist
+        self.prev = prev
+
+    @classmethod
+    def build(cls, graph):
+        """Строит таблицу поиском в ширину из каждого состояния"""
+        offsets = graph.offsets
+        targets = graph.targets
+        count = len(offsets) - 1
+        dist = array('H', [UNREACHABLE]) * (count * count)
+        prev = array('I', [0]) * (count * count)
+        for start in range(count):
+            base = start * count
+            dist[base + start] = 0
+            prev[base + start] = start
+            queue = deque([start])
+            while queue:
+                current = queue.popleft()
+                step = dist[base + current] + 1
+                for i in range(offsets[current], offsets[current + 1]):
+                    code = targets[i]
+                    if dist[base + code] == UNREACHABLE:
+                        dist[base + code] = step
+                        prev[base + code] = current
+                        queue.append(code)
+        return cls(count, dist, prev)
+
+    def distance(self, start_code, goal_code):
+        """Число переправ или None, если цель недостижима"""
+        value = self.dist[start_code * self.count + goal_code]
+        return None if value == UNREACHABLE else value
+
+    def path_codes(self, start_code, goal_code):
+        """Закодированные состояния кратчайшего пути (пустой список, если пути нет)"""
+        base = start_code * self.count
+        if self.dist[base + goal_code] == UNREACHABLE:
+            return []
+        path = [goal_code]
+        current = goal_code
+        while current != start_code:
+            current = self.prev[base + current]
+            path.append(current)
+        path.reverse()
+        return path
+
+    def save(self, filename, key):
+        """Сохраняет таблицу в файл (через временный файл, чтобы не оставить обрывок)"""
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        header = {"version": TABLE_VERSION, "key": repr(key), "count": self.count}
+        temp = filename + ".tmp"
+        with open(temp, "wb") as f:
+            f.write(json.dumps(header).encode() + b"\n")
+            self.dist.tofile(f)
+            self.prev.tofile(f)
+        os.replace(temp, filename)
+
+    @classmethod
+    def load(cls, filename, key):
+        """Читает таблицу из файла; None, если файла нет или он от других правил"""
+        try:
+            with open(filename, "rb") as f:
+                header = json.loads(f.readline())
+                if header.get("version") != TABLE_VERSION or header.get("key") != repr(key):
+                    return None
+                count = header["count"]
+                dist = array('H')
+                prev = array('I')
+                dist.fromfile(f, count * count)
+                prev.fromfile(f, count * count)
+        except (OSError, ValueError, EOFError, KeyError):
+            return None
+        return cls(count, dist, prev)
+
+
+def table_filename(key):
+    """Имя файла таблицы для набора правил"""
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f"paths-{digest}.bin")
+
+
+def get_table(solver):
+    """Таблица путей для правил решателя: из памяти, с диска или построенная заново"""
+    key = solver.rules_key()
+    table = _tables.get(key)
+    if table is None:
+        filename = table_filename(key)
+        table = PathTable.load(filename, key)
+        if table is None:
+            table = PathTable.build(get_graph(solver))
+            try:
+                table.save(filename, key)
+            except OSError:
+                pass  # Без записи на диск таблица просто строится при следующем запуске
+        _tables[key] = table
+    return table
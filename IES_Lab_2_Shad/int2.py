@@ -15,23 +15,44 @@ from PySide6.QtGui import (QBrush, QColor, QConicalGradient, QCursor,
     QFont, QFontDatabase, QGradient, QIcon,
     QImage, QKeySequence, QLinearGradient, QPainter,
     QPalette, QPixmap, QRadialGradient, QTransform)
-from PySide6.QtWidgets import (QApplication, QHeaderView, QLabel, QMainWindow,
-    QMenuBar, QPushButton, QSizePolicy, QStatusBar,
+from PySide6.QtWidgets import (QApplication, QCheckBox, QHeaderView, QLabel,
+    QMainWindow, QMenuBar, QPushButton, QSizePolicy, QStatusBar,
     QTableView, QTextEdit, QWidget)
 
 class Ui_MainWindow(object):
     def setupUi(self, MainWindow):
         if not MainWindow.objectName():
             MainWindow.setObjectName(u"MainWindow")
-        MainWindow.resize(560, 630)
+        MainWindow.resize(560, 730)
         self.centralwidget = QWidget(MainWindow)
         self.centralwidget.setObjectName(u"centralwidget")
         self.pushButton = QPushButton(self.centralwidget)
         self.pushButton.setObjectName(u"pushButton")
-        self.pushButton.setGeometry(QRect(87, 560, 170, 40))
+        self.pushButton.setGeometry(QRect(20, 560, 160, 40))
         self.pushButton2 = QPushButton(self.centralwidget)
         self.pushButton2.setObjectName(u"pushButton2")
-        self.pushButton2.setGeometry(QRect(307, 560, 170, 40))
+        self.pushButton2.setGeometry(QRect(200, 560, 160, 40))
+        self.pushButton3 = QPushButton(self.centralwidget)
+        self.pushButton3.setObjectName(u"pushButton3")
+        self.pushButton3.setGeometry(QRect(380, 560, 160, 40))
+        self.pushButton4 = QPushButton(self.centralwidget)
+        self.pushButton4.setObjectName(u"pushButton4")
+        self.pushButton4.setGeometry(QRect(20, 610, 160, 40))
+        self.pushButton5 = QPushButton(self.centralwidget)
+        self.pushButton5.setObjectName(u"pushButton5")
+        self.pushButton5.setGeometry(QRect(200, 610, 160, 40))
+        self.pushButton6 = QPushButton(self.centralwidget)
+        self.pushButton6.setObjectName(u"pushButton6")
+        self.pushButton6.setGeometry(QRect(380, 610, 160, 40))
+        self.pushButton7 = QPushButton(self.centralwidget)
+        self.pushButton7.setObjectName(u"pushButton7")
+        self.pushButton7.setGeometry(QRect(20, 660, 160, 40))
+        self.checkBox = QCheckBox(self.centralwidget)
+        self.checkBox.setObjectName(u"checkBox")
+        self.checkBox.setGeometry(QRect(200, 660, 170, 40))
+        self.pushButton8 = QPushButton(self.centralwidget)
+        self.pushButton8.setObjectName(u"pushButton8")
+        self.pushButton8.setGeometry(QRect(380, 660, 160, 40))
         self.label = QLabel(self.centralwidget)
         self.label.setObjectName(u"label")
         self.label.setGeometry(QRect(18, 35, 561, 421))
@@ -114,6 +135,13 @@ class Ui_MainWindow(object):
         MainWindow.setWindowTitle(QCoreApplication.translate("MainWindow", u"Переправка", None))
         self.pushButton.setText(QCoreApplication.translate("MainWindow", u"Поиск в глубину", None))
         self.pushButton2.setText(QCoreApplication.translate("MainWindow", u"Поиск в ширину", None))
+        self.pushButton3.setText(QCoreApplication.translate("MainWindow", u"Двунаправленный поиск", None))
+        self.pushButton4.setText(QCoreApplication.translate("MainWindow", u"Поиск A*", None))
+        self.pushButton5.setText(QCoreApplication.translate("MainWindow", u"Поиск IDA*", None))
+        self.pushButton6.setText(QCoreApplication.translate("MainWindow", u"Отмена", None))
+        self.pushButton7.setText(QCoreApplication.translate("MainWindow", u"Гонка стратегий", None))
+        self.checkBox.setText(QCoreApplication.translate("MainWindow", u"Только кратчайший путь", None))
+        self.pushButton8.setText(QCoreApplication.translate("MainWindow", u"Счётчики в JSON", None))
         self.label.setText("")
         self.goat.setText("")
         self.man.setText("")
@@ -0,0 +1,353 @@
+import itertools
+import multiprocessing
+import multiprocessing.connection
+import os
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from solver import COMPACT_MAX_BITS, STRATEGIES, SearchCancelled, Solver, encode
+
+
+# Стратегии, которые по умолчанию соревнуются в гонке
+RACE_STRATEGIES = ("bfs", "dfs", "astar")
+
+# Стратегии, которые всегда находят кратчайший путь
+OPTIMAL_STRATEGIES = ("bfs", "bfs_numpy", "bfs_external", "bfs_parallel", "bidirectional", "astar",
+                      "idastar")
+
+# Как часто (в секундах) гонка сообщает о ходе работы и проверяет отмену
+POLL_INTERVAL = 0.1
+
+# Сколько решателей держит один процесс: у каждого свои таблицы и массивы поиска
+SOLVER_CACHE_SIZE = 4
+
+# Процессы запускаются через spawn: так безопасно и из окна Qt с его потоками
+_context = multiprocessing.get_context("spawn")
+
+# Общие для всех процессов счётчики: номер текущей гонки и ход поиска по участникам
+_race_id = _context.Value('L', 0, lock=False)
+_counters = _context.Array('Q', 2 * len(STRATEGIES), lock=False)
+
+_pool = None
+_pool_lock = threading.Lock()  # Гонки идут по одной: номер гонки и счётчики общие
+
+# Последние решатели, созданные в этом процессе (по правилам и настройкам)
+_solvers = OrderedDict()
+
+
+def _init_worker(race_id, counters):
+    """Запоминает в процессе пула общие счётчики"""
+    global _race_id, _counters
+    _race_id = race_id
+    _counters = counters
+
+
+def get_pool():
+    """Пул процессов для гонок; создаётся при первом обращении и живёт до выхода"""
+    global _pool
+    if _pool is None:
+        workers = min(len(STRATEGIES), os.cpu_count() or 1)
+        _pool = ProcessPoolExecutor(workers, mp_context=_context,
+                                    initializer=_init_worker, initargs=(_race_id, _counters))
+    return _pool
+
+
+def get_solver(puzzle, precompile, symmetry):
+    """Решатель для задачи; процесс хранит SOLVER_CACHE_SIZE последних
+
+    Таблицы одного набора правил строятся один раз, пока его решатель в
+    кеше. При переборе многих вариантов правил (batch) старые решатели
+    вытесняются вместе с таблицей допустимости и массивами поиска, и
+    память процесса не растёт с числом вариантов.
+    """
+    key = puzzle.key(), precompile, symmetry
+    solver = _solvers.get(key)
+    if solver is None:
+        solver = _solvers[key] = Solver(puzzle, precompile, symmetry)
+        if len(_solvers) > SOLVER_CACHE_SIZE:
+            _solvers.popitem(last=False)
+    else:
+        _solvers.move_to_end(key)
+    return solver
+
+
+def _run_strategy(race, slot, puzzle, precompile, symmetry, strategy, start, goal):
+    """Участник гонки: None, если гонка закончилась раньше, чем он нашёл путь"""
+    if _race_id.value != race:
+        return None  # Задача дождалась свободного процесса, когда гонка уже кончилась
+
+    def progress(expanded, frontier):
+        if _race_id.value != race:
+            raise SearchCancelled()
+        _counters[2 * slot] = expanded
+        _counters[2 * slot + 1] = frontier
+
+    solver = get_solver(puzzle, precompile, symmetry)
+    try:
+        return solver.solve(strategy, start, goal, progress)
+    except SearchCancelled:
+        return None
+
+
+def race(solver, start, goal, strategies=RACE_STRATEGIES, optimal=False, progress=None):
+    """Запускает несколько стратегий одновременно в разных процессах
+
+    Возвращает (стратегия, путь) первой закончившей стратегии, остальные
+    останавливаются. Если optimal, в гонке участвуют только стратегии,
+    которые находят кратчайший путь. Все стратегии полные, поэтому пустой
+    путь от любой из них значит, что решения нет. progress работает как
+    в Solver: вызывается с суммарным ходом всех участников и может бросить
+    SearchCancelled.
+    """
+    for strategy in strategies:
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Неизвестная стратегия поиска: {strategy}")
+    if optimal:
+        strategies = [s for s in strategies if s in OPTIMAL_STRATEGIES]
+    strategies = list(dict.fromkeys(strategies))
+    if not strategies:
+        raise ValueError("В гонке нет ни одной подходящей стратегии")
+
+    with _pool_lock:
+        pool = get_pool()
+        _race_id.value += 1
+        race_id = _race_id.value
+        for i in range(len(_counters)):
+            _counters[i] = 0
+
+        futures = {}
+        for slot, strategy in enumerate(strategies):
+            future = pool.submit(_run_strategy, race_id, slot, solver.puzzle, solver.precompile,
+                                 solver.symmetry, strategy, list(start), list(goal))
+            futures[future] = strategy
+
+        error = None
+        pending = set(futures)
+        try:
+            while pending:
+                done, pending = wait(pending, POLL_INTERVAL, FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        states = future.result()
+                    except Exception as e:
+                        error = error or e  # Ошибка одного участника не останавливает остальных
+                        continue
+                    if states is not None:
+                        return futures[future], states
+                if progress is not None:
+                    progress(sum(_counters[0::2]), sum(_counters[1::2]))
+        finally:
+            # Проигравшие увидят новый номер гонки и остановятся
+            _race_id.value += 1
+        raise error or RuntimeError("Гонка закончилась без результата")
+
+
+def _bfs_worker(index, count, puzzle, start_code, goal_code, commands, inboxes, range_inboxes, rank_inboxes):
+    """Процесс параллельного BFS: владеет состояниями с code % count == index
+
+    Посещённые и родители своей доли хранятся, как в Solver._search:
+    массивами по номеру code // count, а для задач больше COMPACT_MAX_BITS
+    бит - словарём только по найденным состояниям. Кроме того, процесс
+    index раздаёт места в очереди ключам index-го диапазона мест
+    родителей (см. parallel_bfs).
+    """
+    solver = get_solver(puzzle, False, False)
+    next_codes = solver.next_codes
+    if solver.nbits <= COMPACT_MAX_BITS:
+        slots = ((1 << solver.nbits) + count - 1) // count
+        visited = bytearray(slots)
+        parent = array('Q', [0]) * slots
+    else:
+        visited = None
+        parent = {}  # Заодно служит множеством посещённых состояний
+    inbox = inboxes[index]
+
+    frontier = []  # Свои состояния текущего слоя в порядке очереди обычного BFS
+    ranks = array('Q')  # Их места в общей очереди слоя
+    keys = array('Q')  # Ключи новых своих состояний, по возрастанию
+    bounds = [0] * (count + 1)  # Границы диапазонов в keys
+    if start_code % count == index:
+        if visited is None:
+            parent[start_code] = start_code
+        else:
+            visited[start_code // count] = 1
+        frontier.append(start_code)
+        ranks.append(0)
+
+    while True:
+        command, value = commands.recv()
+        if command == "expand":
+            # value - размер слоя; ключ соседа - (место родителя, номер переправы):
+            # чем меньше, тем раньше его нашёл бы BFS
+            buckets = [(array('Q'), array('Q'), array('Q')) for _ in range(count)]
+            generated = 0
+            for current, rank in zip(frontier, ranks):
+                base = rank << 32
+                neighbors = next_codes(current)
+                generated += len(neighbors)
+                for j, code in enumerate(neighbors):
+                    codes, found_keys, parents = buckets[code % count]
+                    codes.append(code)
+                    found_keys.append(base | j)
+                    parents.append(current)
+            for other in range(count):
+                if other != index:
+                    inboxes[other].put(buckets[other])
+            batches = [buckets[index]] + [inbox.get() for _ in range(count - 1)]
+
+            best = {}  # Новое состояние -> (наименьший ключ, родитель)
+            for codes, found_keys, parents in batches:
+                for code, key, source in zip(codes, found_keys, parents):
+                    if code in parent if visited is None else visited[code // count]:
+                        continue
+                    found = best.get(code)
+                    if found is None or key < found[0]:
+                        best[code] = (key, source)
+
+            frontier = []
+            keys = array('Q')
+            for code, (key, source) in sorted(best.items(), key=lambda item: item[1][0]):
+                if visited is None:
+                    parent[code] = source
+                else:
+                    visited[code // count] = 1
+                    parent[code // count] = source
+                frontier.append(code)
+                keys.append(key)
+            # Границы диапазонов: доли мест родителей 0..value-1
+            bounds = [bisect_left(keys, (r * value // count) << 32) for r in range(count)] + [len(keys)]
+            counts = [bounds[r + 1] - bounds[r] for r in range(count)]
+            commands.send((counts, goal_code in best, generated))
+        elif command == "rank":
+            # Свои ключи - владельцам диапазонов, от всех - ключи своего диапазона
+            for r in range(count):
+                range_inboxes[r].put((index, keys[bounds[r]:bounds[r + 1]]))
+            parts = dict(range_inboxes[index].get() for _ in range(count))
+            # Ключи разных процессов не совпадают: каждый - своя пара (родитель, переправа)
+            merged = sorted(itertools.chain.from_iterable(parts.values()))
+            place = dict(zip(merged, range(value, value + len(merged))))
+            for owner, part in parts.items():
+                rank_inboxes[owner].put((index, array('Q', map(place.__getitem__, part))))
+            # Места своих ключей - по диапазонам по порядку, как и сами ключи
+            answers = dict(rank_inboxes[index].get() for _ in range(count))
+            ranks = array('Q')
+            for r in range(count):
+                ranks.extend(answers[r])
+        elif command == "parent":
+            commands.send(parent[value] if visited is None else parent[value // count])
+        else:
+            return
+
+
+def _receive(connections, processes):
+    """Ответ каждого процесса по его каналу, по порядку
+
+    Ждёт каналы вместе с самими процессами: если процесс завершился, не
+    ответив (например, упал с MemoryError), бросает RuntimeError, а не
+    ждёт вечно.
+    """
+    replies = [None] * len(connections)
+    waiting = dict(enumerate(connections))
+    while waiting:
+        ready = multiprocessing.connection.wait(
+            list(waiting.values()) + [processes[i].sentinel for i in waiting])
+        for i, connection in list(waiting.items()):
+            if connection.poll():
+                replies[i] = connection.recv()
+                del waiting[i]
+            elif processes[i].sentinel in ready:
+                processes[i].join()
+                raise RuntimeError(f"Процесс параллельного BFS завершился с кодом {processes[i].exitcode}")
+    return replies
+
+
+def parallel_bfs(solver, start, goal, workers=None, progress=None):
+    """Поиск в ширину в нескольких процессах, каждый владеет долей состояний
+
+    Состояние принадлежит процессу code % workers; свои посещённые и
+    родителей процесс хранит сам. На каждом слое процессы раскрывают свои
+    состояния и пересылают соседей владельцам пачками через очереди.
+    Чтобы путь совпал с search_bfs, у соседа запоминается ключ (место
+    родителя в очереди BFS, номер переправы), владелец оставляет
+    наименьший. Места в очереди следующего слоя тоже раздают процессы:
+    места родителей делятся на workers равных диапазонов, процесс r
+    собирает ключи r-го диапазона со всех, сортирует их и возвращает
+    владельцам места, начиная с суммы размеров младших диапазонов
+    (её считает координатор по присланным размерам). Координатору
+    остаются только размеры и команды. progress вызывается после
+    каждого слоя и может бросить SearchCancelled. Если процесс
+    завершился раньше времени, бросается RuntimeError.
+
+    Процессы запускаются заново на каждый поиск и строят свои таблицы,
+    поэтому выигрыш возможен только на больших задачах и при нескольких
+    ядрах. При склейке одинаковых объектов путь другой, поэтому тогда
+    просто вызывается search_bfs.
+    """
+    if solver.classes:
+        return solver.search_bfs(start, goal, progress)
+    start_code = encode(start)
+    goal_code = encode(goal)
+    if start_code == goal_code:
+        return solver.decode_path([start_code])
+    if not solver.valid[goal_code]:
+        return solver.decode_path([])
+    count = workers or os.cpu_count() or 1
+
+    inboxes = [_context.Queue() for _ in range(count)]
+    range_inboxes = [_context.Queue() for _ in range(count)]
+    rank_inboxes = [_context.Queue() for _ in range(count)]
+    pipes = [_context.Pipe() for _ in range(count)]
+    processes = [_context.Process(target=_bfs_worker, daemon=True,
+                                  args=(i, count, solver.puzzle, start_code, goal_code, pipes[i][1],
+                                        inboxes, range_inboxes, rank_inboxes))
+                 for i in range(count)]
+    for process in processes:
+        process.start()
+    commands = [pipe[0] for pipe in pipes]
+    try:
+        layer = 1
+        expanded = generated = 0
+        visited = peak = 1
+        while True:
+            for connection in commands:
+                connection.send(("expand", layer))
+            expanded += layer
+            replies = _receive(commands, processes)
+            generated += sum(reply[2] for reply in replies)
+            sizes = [sum(counts[r] for counts, _, _ in replies) for r in range(count)]
+            layer = sum(sizes)
+            visited += layer
+            peak = max(peak, layer)
+            if progress is not None:
+                progress(expanded, layer)
+            if any(found for _, found, _ in replies):
+                break
+            if not layer:
+                solver.record(expanded, generated, visited, peak)
+                return solver.decode_path([])
+            start_rank = 0
+            for connection, size in zip(commands, sizes):
+                connection.send(("rank", start_rank))
+                start_rank += size
+
+        solver.record(expanded, generated, visited, peak)
+        path = [goal_code]
+        while path[-1] != start_code:
+            owner = path[-1] % count
+            commands[owner].send(("parent", path[-1]))
+            path.extend(_receive([commands[owner]], [processes[owner]]))
+        path.reverse()
+        return solver.decode_path(path)
+    finally:
+        for connection in commands:
+            try:
+                connection.send(("stop", None))
+            except OSError:
+                pass
+        for process in processes:
+            process.join(1)
+            if process.is_alive():
+                process.terminate()
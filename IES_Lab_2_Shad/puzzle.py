@@ -0,0 +1,74 @@
+# Объекты стандартной задачи (столбцы таблиц Start и Goal)
+ACTORS = ['Ч', 'Ко', 'Ка', 'В1', 'В2', 'Сб']
+
+# Запрещённые пары (нельзя оставлять без человека и нельзя везти вместе)
+FORBIDDEN = [
+    (1, 2),  # Коза + капуста
+    (1, 3),  # Коза + волк1
+    (1, 4),  # Коза + волк2
+    (3, 5),  # Волк1 + собака
+    (4, 5)  # Волк2 + собака
+]
+
+
+class Puzzle:
+    """Описание задачи о переправе
+
+    actors - имена объектов, conflicts - пары объектов (по индексу или
+    имени), которые нельзя оставлять на берегу без гребца и нельзя везти
+    вместе, capacity - сколько пассажиров помимо гребца берёт лодка,
+    rowers - кто умеет грести (они же присматривают за остальными),
+    solo_first - пробовать ли сначала переправу гребца в одиночку (от
+    порядка переправ зависит, какой путь найдёт поиск в глубину).
+    """
+
+    def __init__(self, actors, conflicts, capacity=2, rowers=(0,), solo_first=False):
+        self.actors = list(actors)
+        self.capacity = capacity
+        self.solo_first = solo_first
+        self.conflicts = sorted({tuple(sorted((self.index(a), self.index(b)))) for a, b in conflicts})
+        self.rowers = tuple(sorted({self.index(r) for r in rowers}))
+        if not self.rowers:
+            raise ValueError("В задаче должен быть хотя бы один гребец")
+        if capacity < 0:
+            raise ValueError(f"Недопустимая вместимость лодки: {capacity}")
+
+    @property
+    def size(self):
+        """Количество объектов"""
+        return len(self.actors)
+
+    def index(self, actor):
+        """Индекс объекта по имени или номеру"""
+        if isinstance(actor, int):
+            if not 0 <= actor < self.size:
+                raise ValueError(f"Нет объекта с номером {actor}")
+            return actor
+        try:
+            return self.actors.index(actor)
+        except ValueError:
+            raise ValueError(f"Нет объекта с именем {actor}") from None
+
+    def with_conflicts(self, conflicts):
+        """Та же задача с другим набором конфликтов"""
+        return Puzzle(self.actors, conflicts, self.capacity, self.rowers, self.solo_first)
+
+    def key(self):
+        """Ключ правил и порядка переправ задачи (имена объектов на решение не влияют)"""
+        return self.size, self.capacity, self.rowers, tuple(self.conflicts), self.solo_first
+
+
+DEFAULT_PUZZLE = Puzzle(ACTORS, FORBIDDEN, capacity=2)
+
+# Названия берегов в журнале решения
+BANK_NAMES = ("Левый", "Правый")
+
+
+def log_row(state):
+    """Строка журнала решения для одного состояния"""
+    return "\t".join(BANK_NAMES[bank] for bank in state) + "\n"
+
+
+def log_rows(states):
+    """Готовые строки журнала решения: по строке на каждое состояние пути"""
+    return [log_row(state) for state in states]
@@ -0,0 +1,139 @@
+from collections import OrderedDict
+
+# Последние собранные правила по ключу задачи (Puzzle.key())
+_compiled = OrderedDict()
+
+# Сколько наборов правил хранится: решатели держат свои правила сами,
+# а перебор вариантов правил не должен копить их без конца
+RULES_CACHE_SIZE = 64
+
+
+def _or_bytes(a, b):
+    """Побайтовое ИЛИ двух строк из байтов 0/1 одной длины"""
+    return (int.from_bytes(a, 'little') | int.from_bytes(b, 'little')).to_bytes(len(a), 'little')
+
+
+def _and_bytes(a, b):
+    """Побайтовое И двух строк из байтов 0/1 одной длины"""
+    return (int.from_bytes(a, 'little') & int.from_bytes(b, 'little')).to_bytes(len(a), 'little')
+
+
+def _disjoint(mask, nbits):
+    """Строка длины 2^nbits: 1 для подмножеств s, не пересекающихся с mask"""
+    table = b"\x01"
+    for bit in range(nbits):
+        table += bytes(len(table)) if mask >> bit & 1 else table
+    return table
+
+
+class CompiledRules:
+    """Правила задачи (Puzzle), собранные в битовые проверки
+
+    Для каждого объекта хранится маска тех, с кем он конфликтует, а для
+    каждого байта номеров объектов - таблица на 256 значений: объединение
+    масок конфликтов всех объектов этого байта. Тогда любое подмножество
+    объектов проверяется несколькими чтениями таблиц и одним AND: в нём
+    есть конфликт, если оно пересекается с объединением конфликтов своих
+    членов. Одна и та же проверка отвечает и за берег без гребца, и за
+    набор пассажиров в лодке; таблица допустимости всех состояний
+    (valid_table) собирается из тех же таблиц.
+    """
+
+    def __init__(self, puzzle):
+        self.size = puzzle.size
+        self.actors_mask = (1 << self.size) - 1
+        self.rowers_mask = 0
+        for rower in puzzle.rowers:
+            self.rowers_mask |= 1 << rower
+
+        self.pair_masks = [(1 << a) | (1 << b) for (a, b) in puzzle.conflicts]
+        # conflicts[i] - с кем конфликтует объект i
+        self.conflicts = [0] * self.size
+        for a, b in puzzle.conflicts:
+            self.conflicts[a] |= 1 << b
+            self.conflicts[b] |= 1 << a
+        # compatible[i] - с кем объект i может ехать в одной лодке
+        self.compatible = [self.actors_mask & ~self.conflicts[i] & ~(1 << i) for i in range(self.size)]
+
+        # (сдвиг, таблица): таблица[байт] - объединение конфликтов объектов этого байта
+        self.tables = []
+        for shift in range(0, self.size, 8):
+            table = [0] * 256
+            for value in range(1, 256):
+                low = value & -value
+                actor = shift + low.bit_length() - 1
+                table[value] = table[value ^ low] | (self.conflicts[actor] if actor < self.size else 0)
+            self.tables.append((shift, table))
+
+    def conflicting(self, subset):
+        """Объекты подмножества, у которых внутри него есть конфликт (0 - конфликтов нет)"""
+        reach = 0
+        for shift, table in self.tables:
+            reach |= table[(subset >> shift) & 0xFF]
+        return subset & reach
+
+    def unsafe_bank(self, bank):
+        """Эти объекты нельзя оставить на берегу: есть конфликт, а гребца нет"""
+        return not bank & self.rowers_mask and bool(self.conflicting(bank))
+
+    def incompatible(self, cargo):
+        """Этот набор нельзя везти в лодке вместе"""
+        return bool(self.conflicting(cargo))
+
+    def is_valid_code(self, code):
+        """Допустимость закодированного состояния: конфликт на берегу только при гребце"""
+        right = code & self.actors_mask
+        return not self.unsafe_bank(right) and not self.unsafe_bank(right ^ self.actors_mask)
+
+    def safe_banks(self):
+        """Строка длины 2^size: 1 для подмножеств объектов, которые можно оставить на берегу
+
+        Та же проверка, что unsafe_bank, но сразу для всех подмножеств:
+        они строятся по байтам номеров объектов. Подмножество из младших
+        байтов s и нового байта value безопасно, если s безопасно, value
+        само по себе без конфликта и s не пересекается с конфликтами
+        value (tables). Операции идут над строками байтов, а не по одному
+        подмножеству.
+        """
+        safe = b"\x01"  # Пустое подмножество
+        for shift, table in self.tables:
+            low_mask = (1 << shift) - 1
+            blocks = []
+            cache = {}  # Маска конфликтов с младшими объектами -> блок
+            for value in range(1 << min(8, self.size - shift)):
+                if self.conflicting(value << shift):
+                    blocks.append(bytes(len(safe)))
+                    continue
+                reach = table[value] & low_mask
+                block = cache.get(reach)
+                if block is None:
+                    block = cache[reach] = _and_bytes(safe, _disjoint(reach, shift))
+                blocks.append(block)
+            safe = b"".join(blocks)
+        # Берег с гребцом допустим всегда
+        with_rower = _disjoint(self.rowers_mask, self.size).translate(bytes([1, 0]) + bytes(254))
+        return _or_bytes(safe, with_rower)
+
+    def valid_table(self, nbits):
+        """bytearray длины 2^nbits: 1 - состояние допустимо (оба берега безопасны)
+
+        Левый берег - дополнение правого, поэтому его безопасность - та же
+        строка, прочитанная задом наперёд. Бит лодки (если он есть) на
+        допустимость не влияет.
+        """
+        banks = self.safe_banks()
+        table = bytearray(_and_bytes(banks, banks[::-1]))
+        return table * (1 << (nbits - self.size))
+
+
+def compile_rules(puzzle):
+    """Собранные правила задачи; для недавних наборов правил собираются один раз"""
+    key = puzzle.key()
+    rules = _compiled.get(key)
+    if rules is None:
+        rules = _compiled[key] = CompiledRules(puzzle)
+        if len(_compiled) > RULES_CACHE_SIZE:
+            _compiled.popitem(last=False)
+    else:
+        _compiled.move_to_end(key)
+    return rules
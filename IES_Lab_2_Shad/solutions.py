@@ -0,0 +1,130 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+
+from graph import CACHE_DIR
+
+
+# Версия формата записей; при её смене старые решения отбрасываются
+SOLUTIONS_VERSION = 2
+
+# Сколько решений хранится в файле; самые давно не использованные удаляются
+MAX_SOLUTIONS = 100000
+
+# Файл кеша по умолчанию
+SOLUTIONS_FILE = os.path.join(CACHE_DIR, "solutions.sqlite")
+
+# Открытые кеши этого процесса по имени файла
+_caches = {}
+
+
+def rules_digest(solver):
+    """Хеш правил задачи и настроек, от которых зависит найденный путь"""
+    return hashlib.sha1(repr((solver.rules_key(), solver.symmetry)).encode()).hexdigest()
+
+
+class SolutionCache:
+    """Найденные пути, сохраняемые между запусками в файле SQLite
+
+    Ключ - хеш правил, стратегия и закодированные начало и цель, значение -
+    закодированные состояния пути (пустой путь тоже запоминается: решения
+    нет). При переполнении удаляются записи, к которым дольше всего не
+    обращались. Ошибки базы не мешают поиску: кеш просто не срабатывает.
+    """
+
+    def __init__(self, filename=SOLUTIONS_FILE, max_entries=MAX_SOLUTIONS):
+        self.filename = filename
+        self.max_entries = max_entries
+        self.lock = threading.Lock()  # Поиск может идти в потоке пула, а не в главном
+        self.conn = None
+        try:
+            self.conn = self._open()
+            self.count = self.conn.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+        except (OSError, sqlite3.Error):
+            self.conn = None  # Без файла поиск работает как раньше
+
+    def _open(self):
+        """Открывает базу; если версия записей другая, начинает с пустой"""
+        directory = os.path.dirname(self.filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.filename, timeout=10, check_same_thread=False,
+                               isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)")
+        row = conn.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+        if row is None or row[0] != SOLUTIONS_VERSION:
+            conn.execute("DROP TABLE IF EXISTS solutions")
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (SOLUTIONS_VERSION,))
+        conn.execute("""CREATE TABLE IF NOT EXISTS solutions (
+                            rules TEXT, strategy TEXT, start INTEGER, goal INTEGER,
+                            path BLOB, used REAL,
+                            PRIMARY KEY (rules, strategy, start, goal))""")
+        conn.execute("CREATE INDEX IF NOT EXISTS solutions_used ON solutions (used)")
+        return conn
+
+    def get(self, rules, strategy, start_code, goal_code):
+        """Закодированный путь или None, если такого решения в кеше нет"""
+        if self.conn is None:
+            return None
+        key = (rules, strategy, start_code, goal_code)
+        try:
+            with self.lock:
+                row = self.conn.execute("SELECT path FROM solutions WHERE rules = ? AND strategy = ? "
+                                        "AND start = ? AND goal = ?", key).fetchone()
+                if row is None:
+                    return None
+                self.conn.execute("UPDATE solutions SET used = ? WHERE rules = ? AND strategy = ? "
+                                  "AND start = ? AND goal = ?", (time.time(),) + key)
+        except (OverflowError, sqlite3.Error):
+            return None
+        path = array('Q')
+        path.frombytes(row[0])
+        return list(path)
+
+    def put(self, rules, strategy, start_code, goal_code, codes):
+        """Запоминает закодированный путь"""
+        if self.conn is None:
+            return
+        try:
+            blob = array('Q', codes).tobytes()
+            with self.lock:
+                self.conn.execute("INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?, ?, ?)",
+                                  (rules, strategy, start_code, goal_code, blob, time.time()))
+                self.count += 1
+                if self.count > self.max_entries:
+                    self._evict()
+        except (OverflowError, sqlite3.Error):
+            pass
+
+    def _evict(self):
+        """Удаляет самые давно использованные записи сверх max_entries"""
+        # Файлом могут пользоваться несколько процессов, поэтому считаем заново
+        count = self.conn.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+        if count > self.max_entries:
+            self.conn.execute("DELETE FROM solutions WHERE rowid IN "
+                              "(SELECT rowid FROM solutions ORDER BY used LIMIT ?)",
+                              (count - self.max_entries,))
+        self.count = min(count, self.max_entries)
+
+    def clear(self):
+        """Удаляет все сохранённые решения"""
+        if self.conn is None:
+            return
+        try:
+            with self.lock:
+                self.conn.execute("DELETE FROM solutions")
+                self.count = 0
+        except sqlite3.Error:
+            pass
+
+
+def get_cache(filename=SOLUTIONS_FILE):
+    """Кеш решений для файла; в каждом процессе открывается один раз"""
+    cache = _caches.get(filename)
+    if cache is None:
+        cache = _caches[filename] = SolutionCache(filename)
+    return cache
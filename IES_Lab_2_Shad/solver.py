@@ -0,0 +1,931 @@
+import heapq
+import sys
+from array import array
+from collections import OrderedDict, deque
+from collections.abc import Sequence
+from contextlib import nullcontext
+from math import comb
+
+try:
+    import numpy as np
+except ImportError:  # NumPy не обязателен: без него search_bfs_numpy работает как search_bfs
+    np = None
+
+from external import external_bfs
+from graph import get_graph, get_table
+from puzzle import DEFAULT_PUZZLE
+from rules import compile_rules
+from solutions import rules_digest
+from stats import SearchStats
+from symmetry import Symmetry, interchangeable_classes
+
+
+# Таблица допустимости строится целиком, пока в ней не больше 2^24 записей
+VALID_TABLE_MAX_BITS = 24
+
+# Таблица путей между всеми парами хранит 2^(2n) записей, поэтому только для малых задач
+PATH_TABLE_MAX_BITS = 10
+
+# Общий список переправ строится, пока в нём не больше стольких вариантов;
+# для больших задач наборы груза перебираются прямо от берега лодки
+MOVE_TABLE_MAX = 2048
+
+# До такого числа бит посещённые состояния и родители хранятся массивами
+# на все 2^n состояний (5 байт на состояние), для больших задач - словарём
+COMPACT_MAX_BITS = 26
+
+# Сколько соседей (состояние x переправа) search_bfs_numpy обрабатывает за раз
+NUMPY_BLOCK = 1 << 20
+
+# Как часто (в раскрытых состояниях) поиск сообщает о ходе работы
+PROGRESS_INTERVAL = 1024
+
+# Сколько последних решений Solver помнит в памяти
+MEMO_SIZE = 256
+
+# Стратегии поиска: имя -> метод Solver
+STRATEGIES = {
+    "bfs": "search_bfs",
+    "bfs_numpy": "search_bfs_numpy",
+    "bfs_external": "search_bfs_external",
+    "bfs_parallel": "search_bfs_parallel",
+    "dfs": "search_dfs",
+    "bidirectional": "search_bidirectional",
+    "astar": "search_astar",
+    "idastar": "search_idastar",
+}
+
+
+def encode(state):
+    """Кодирует состояние [0, 1, ...] в целое число: бит i - берег объекта i"""
+    code = 0
+    for i, bank in enumerate(state):
+        if bank:
+            code |= 1 << i
+    return code
+
+
+def decode(code, size):
+    """Раскодирует целое число обратно в список из size элементов"""
+    return [(code >> i) & 1 for i in range(size)]
+
+
+class StatePath(Sequence):
+    """Найденный путь: хранит коды состояний, а списки выдаёт по запросу
+
+    Ведёт себя как список состояний (длина, индексы, перебор, сравнение
+    со списком), но каждое состояние раскодируется только при обращении,
+    поэтому длинный путь занимает по 8 байт на шаг.
+    """
+
+    def __init__(self, codes, nbits):
+        self.codes = codes if isinstance(codes, array) else array('Q', codes)
+        self.nbits = nbits
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return StatePath(self.codes[index], self.nbits)
+        return decode(self.codes[index], self.nbits)
+
+    def __iter__(self):
+        nbits = self.nbits
+        for code in self.codes:
+            yield decode(code, nbits)
+
+    def __eq__(self, other):
+        if isinstance(other, StatePath):
+            return self.nbits == other.nbits and self.codes == other.codes
+        if isinstance(other, (list, tuple)):
+            return len(other) == len(self) and all(a == list(b) for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+def compatible_sets(candidates, count, compatible):
+    """Все наборы из count объектов маски candidates без конфликтов между собой
+
+    compatible[i] - маска объектов, которых можно везти вместе с i.
+    Наборы выдаются в лексикографическом порядке номеров; перебираются
+    только совместимые продолжения, а не все подмножества берега.
+    """
+    if count == 0:
+        yield 0
+        return
+    while candidates:
+        if bin(candidates).count("1") < count:
+            return
+        low = candidates & -candidates
+        candidates ^= low
+        rest = candidates & compatible[low.bit_length() - 1]
+        for tail in compatible_sets(rest, count - 1, compatible):
+            yield low | tail
+
+
+def _untimed(name):
+    """Замена SearchStats.phase, когда счётчики выключены"""
+    return nullcontext()
+
+
+class SearchCancelled(Exception):
+    """Поиск прерван: это исключение бросает функция progress, чтобы остановить поиск"""
+
+
+class _ValidityCheck:
+    """Замена таблицы для очень больших задач: считает допустимость при обращении"""
+
+    def __init__(self, solver):
+        self.solver = solver
+
+    def __getitem__(self, code):
+        return self.solver.check_code(code)
+
+
+class Solver:
+    """Поиск решения задачи о переправе без зависимости от Qt
+
+    Состояние внутри хранится одним целым числом (бит на объект,
+    0 - левый берег, 1 - правый), переправа - это XOR с маской.
+    Если гребец один, положение лодки совпадает с его битом; если
+    гребцов несколько, лодке отводится отдельный последний бит.
+    """
+
+    def __init__(self, puzzle=None, precompile=False, symmetry=False, cache=None, instrument=False,
+                 workers=None):
+        self.precompile = precompile  # Строить ли полный граф переходов заранее
+        self.symmetry = symmetry  # Склеивать ли состояния, отличающиеся перестановкой одинаковых объектов
+        self.cache = cache  # Сохранённые решения (solutions.SolutionCache) или None
+        self.rules_version = 0  # Растёт при каждой смене правил
+        self.memo = OrderedDict()  # Последние решения: (стратегия, начало, цель, версия правил) -> путь
+        self.memo_hits = 0
+        self.memo_misses = 0
+        self.instrument = instrument  # Собирать ли счётчики поиска (stats.SearchStats)
+        self.workers = workers  # Процессов для bfs_parallel (None - по числу ядер)
+        self.stats = None  # Счётчики последнего solve, если instrument
+        self.set_puzzle(DEFAULT_PUZZLE if puzzle is None else puzzle)
+
+    def set_puzzle(self, puzzle):
+        """Задаёт задачу и заново строит таблицы допустимости и переправ"""
+        self.puzzle = puzzle
+        self.rules_version += 1
+        self.memo.clear()
+        self.size = puzzle.size  # Количество объектов
+        self.capacity = puzzle.capacity
+        # Все проверки правил - через одни и те же собранные битовые маски
+        self.rules = compile_rules(puzzle)
+        self.actors_mask = self.rules.actors_mask
+        self.rowers_mask = self.rules.rowers_mask
+
+        if len(puzzle.rowers) == 1:
+            # Единственный гребец всегда в лодке, с ним едут до capacity пассажиров
+            self.nbits = self.size
+            self.boat = self.rowers_mask
+            self.cargo_limit = self.capacity
+        else:
+            # Лодка - отдельный бит, в ней до capacity + 1 человек, среди них гребец
+            self.nbits = self.size + 1
+            self.boat = 1 << self.size
+            self.cargo_limit = self.capacity + 1
+        self.full = (1 << self.nbits) - 1
+
+        self.pair_masks = self.rules.pair_masks
+        self.compatible = self.rules.compatible  # compatible[i] - с кем объект i может ехать в одной лодке
+
+        if self.nbits <= VALID_TABLE_MAX_BITS:
+            self.valid = self.rules.valid_table(self.nbits)
+        elif self.precompile:
+            raise ValueError(f"Слишком много объектов для полного графа: {self.size}")
+        else:
+            self.valid = _ValidityCheck(self)
+
+        # Для небольших задач переправы перечисляются заранее одним списком
+        cargo_pool = self.size - (1 if self.boat == self.rowers_mask else 0)
+        table_size = sum(comb(cargo_pool, count) for count in range(self.cargo_limit + 1))
+        self.moves = self.build_moves() if table_size <= MOVE_TABLE_MAX else None
+
+        self.classes = interchangeable_classes(self) if self.symmetry else []
+        self.buffers = None  # Массивы посещённых и родителей для _search_compact
+
+        self.graph = get_graph(self) if self.precompile else None
+        # Для небольших задач заранее известны кратчайшие пути между всеми парами
+        if self.precompile and self.nbits <= PATH_TABLE_MAX_BITS:
+            self.table = get_table(self)
+        else:
+            self.table = None
+
+    def set_forbidden(self, forbidden):
+        """Задаёт новые запрещённые пары и пересобирает таблицы"""
+        self.set_puzzle(self.puzzle.with_conflicts(forbidden))
+
+    def rules_key(self):
+        """Ключ набора правил: от него зависят таблицы и граф переходов"""
+        return self.puzzle.key()
+
+    def check_code(self, code):
+        """Проверяет закодированное состояние: запрещённая пара не остаётся без гребца"""
+        return self.rules.is_valid_code(code)
+
+    def is_valid_code(self, code):
+        """Допустимость закодированного состояния (чтение из таблицы)"""
+        return bool(self.valid[code])
+
+    def is_valid_state(self, state):
+        """Проверяет, является ли состояние допустимым"""
+        return bool(self.valid[encode(state)])
+
+    def can_transport_together(self, item1, item2):
+        """Проверяет, можно ли перевозить два предмета вместе"""
+        return not self.rules.incompatible((1 << item1) | (1 << item2))
+
+    def moves_from(self, bank):
+        """Маски переправ для объектов bank на берегу лодки
+
+        Сначала одиночные пассажиры, затем пары и т.д. (по возрастанию
+        номеров), в конце - гребец переезжает один (с puzzle.solo_first -
+        в начале).
+        """
+        moves = []
+        if self.boat == self.rowers_mask:
+            # Гребец один и едет всегда; груз должен быть совместим с ним
+            rower = self.rowers_mask.bit_length() - 1
+            candidates = bank & self.compatible[rower]
+            for count in range(1, self.cargo_limit + 1):
+                for cargo in compatible_sets(candidates, count, self.compatible):
+                    moves.append(self.boat | cargo)
+            if bank & self.boat:
+                if self.puzzle.solo_first:
+                    moves.insert(0, self.boat)
+                else:
+                    moves.append(self.boat)
+        else:
+            for count in range(1, self.cargo_limit + 1):
+                for passengers in compatible_sets(bank, count, self.compatible):
+                    if passengers & self.rowers_mask:
+                        moves.append(self.boat | passengers)
+        return moves
+
+    def build_moves(self):
+        """Строит общий список масок переправ, подходящий для любого состояния"""
+        return self.moves_from(self.actors_mask)
+
+    def next_codes(self, code):
+        """Генерирует закодированные допустимые состояния после одной переправы"""
+        valid = self.valid
+        next_codes = []
+        moves = self.moves
+        if moves is None:
+            # Перебираем только совместимые наборы из тех, кто стоит у лодки
+            bank = (code if code & self.boat else ~code) & self.actors_mask
+            for move in self.moves_from(bank):
+                new_code = code ^ move
+                if valid[new_code]:
+                    next_codes.append(new_code)
+            return next_codes
+
+        for move in moves:
+            # Все, кто в лодке, должны быть на одном берегу с ней
+            side = code & move
+            if side == 0 or side == move:
+                new_code = code ^ move
+                if valid[new_code]:
+                    next_codes.append(new_code)
+        return next_codes
+
+    def generate_next_states(self, current_state):
+        """Генерирует все возможные следующие допустимые состояния (можно перевозить до capacity объектов)"""
+        return [decode(code, self.nbits) for code in self.next_codes(encode(current_state))]
+
+    def _search(self, start, goal, pop, progress=None):
+        """Общий обход графа состояний; pop определяет порядок (очередь или стек)
+
+        progress(раскрыто, размер фронта) вызывается каждые PROGRESS_INTERVAL
+        раскрытых состояний; чтобы отменить поиск, она бросает SearchCancelled.
+        """
+        queue = deque()
+        parent = {}  # Заодно служит множеством посещённых состояний
+
+        start_code = encode(start)
+        goal_code = encode(goal)
+
+        # С готовым графом недостижимую цель видно сразу, а соседи берутся из массивов
+        graph = self.graph
+        if graph is not None and not graph.reachable(start_code, goal_code):
+            return self.decode_path([])
+        if self.classes:
+            symmetry = Symmetry(self.classes, start_code)
+            if symmetry:
+                return self._search_symmetric(start_code, goal_code, pop, symmetry, progress)
+        expand = self.expander()
+        if self.nbits <= COMPACT_MAX_BITS:
+            return self._search_compact(start_code, goal_code, pop, expand, progress)
+
+        queue.append(start_code)
+        parent[start_code] = None
+
+        found = False
+        expanded = 0
+        generated = 0
+        peak = 1
+
+        while queue:
+            current = pop(queue)
+
+            if current == goal_code:
+                found = True
+                break
+
+            expanded += 1
+            if progress is not None and expanded % PROGRESS_INTERVAL == 0:
+                progress(expanded, len(queue))
+
+            neighbors = expand(current)
+            generated += len(neighbors)
+            for code in neighbors:
+                if code not in parent:
+                    parent[code] = current
+                    queue.append(code)
+            if len(queue) > peak:
+                peak = len(queue)
+
+        self.record(expanded, generated, len(parent), peak, sys.getsizeof(parent))
+        # Восстанавливаем путь
+        if not found:
+            return self.decode_path([])
+        return self.build_path(parent, goal_code)
+
+    def _search_compact(self, start_code, goal_code, pop, expand, progress=None):
+        """Тот же обход, но посещённые - байт на состояние, родители - массив по коду состояния
+
+        Массивы на 2^nbits записей выделяются один раз на задачу и
+        переиспользуются: состояние посещено, если в его байте метка
+        текущего поиска, поэтому перед поиском ничего не очищается
+        (метки обнуляются целиком раз в 255 поисков). Если массивы заняты
+        другим поиском, этот выделяет свои.
+        """
+        buffers = self.buffers
+        self.buffers = None
+        if buffers is None:
+            count = 1 << self.nbits
+            buffers = [bytearray(count), array('I', [0]) * count, 0]
+        if buffers[2] == 255:
+            buffers[0] = bytearray(len(buffers[0]))
+            buffers[2] = 0
+        buffers[2] += 1
+        visited, parent, mark = buffers
+        try:
+            return self._walk_compact(start_code, goal_code, pop, expand, progress, visited, parent, mark)
+        finally:
+            self.buffers = buffers
+
+    def _walk_compact(self, start_code, goal_code, pop, expand, progress, visited, parent, mark):
+        """Цикл обхода _search_compact над готовыми массивами"""
+        queue = deque([start_code])
+        visited[start_code] = mark
+
+        found = False
+        expanded = 0
+        generated = 0
+        peak = 1
+        while queue:
+            current = pop(queue)
+
+            if current == goal_code:
+                found = True
+                break
+
+            expanded += 1
+            if progress is not None and expanded % PROGRESS_INTERVAL == 0:
+                progress(expanded, len(queue))
+
+            neighbors = expand(current)
+            generated += len(neighbors)
+            for code in neighbors:
+                if visited[code] != mark:
+                    visited[code] = mark
+                    parent[code] = current
+                    queue.append(code)
+            if len(queue) > peak:
+                peak = len(queue)
+
+        # Каждое посещённое состояние либо раскрыто, либо ещё в очереди, либо цель
+        self.record(expanded, generated, expanded + len(queue) + found, peak,
+                    len(visited) + parent.itemsize * len(parent))
+        if not found:
+            return self.decode_path([])
+        return self.trace_path(parent, start_code, goal_code)
+
+    def _search_symmetric(self, start_code, goal_code, pop, symmetry, progress=None):
+        """Обход, в котором посещённые состояния хранятся в каноническом виде
+
+        Очередь и словарь родителей держат канонические ключи, а для
+        каждого ключа запоминается реальное состояние, из которого
+        продолжается поиск, поэтому путь из представителей допустим.
+        """
+        canon = symmetry.canon
+        expand = self.expander()
+        goal_key = canon(goal_code)
+
+        queue = deque([start_code])  # Начало уже каноническое (см. Symmetry)
+        parent = {start_code: None}
+        state = {start_code: start_code}  # Ключ -> реальное состояние
+
+        found = False
+        expanded = 0
+        generated = 0
+        peak = 1
+        while queue:
+            key = pop(queue)
+            if key == goal_key:
+                found = True
+                break
+            expanded += 1
+            if progress is not None and expanded % PROGRESS_INTERVAL == 0:
+                progress(expanded, len(queue))
+            current = state[key]
+            neighbors = expand(current)
+            generated += len(neighbors)
+            for code in neighbors:
+                child = canon(code)
+                if child not in parent:
+                    parent[child] = key
+                    state[child] = code
+                    queue.append(child)
+            if len(queue) > peak:
+                peak = len(queue)
+
+        self.record(expanded, generated, len(parent), peak, sys.getsizeof(parent) + sys.getsizeof(state))
+        if not found:
+            return self.decode_path([])
+        path = []
+        key = goal_key
+        while key is not None:
+            path.append(state[key])
+            key = parent[key]
+        path.reverse()
+        return self.decode_path(symmetry.align(path, goal_code))
+
+    def iter_search(self, start, goal, depth_first=False):
+        """Обход в ширину (или в глубину) по шагам - для показа поиска вживую
+
+        Генератор: сначала выдаёт ("expand", состояние) для каждого
+        раскрытого состояния, затем ("step", состояние) для каждого шага
+        найденного пути от начала к цели (если пути нет, шагов не будет).
+        Порядок обхода и путь те же, что у search_bfs и search_dfs без
+        склейки одинаковых объектов.
+        """
+        pop = deque.pop if depth_first else deque.popleft
+        start_code = encode(start)
+        goal_code = encode(goal)
+        graph = self.graph
+        if graph is not None and not graph.reachable(start_code, goal_code):
+            return
+        expand = self.expander()
+        nbits = self.nbits
+
+        queue = deque([start_code])
+        parent = {start_code: None}
+        while queue:
+            current = pop(queue)
+            if current == goal_code:
+                break
+            yield "expand", decode(current, nbits)
+            for code in expand(current):
+                if code not in parent:
+                    parent[code] = current
+                    queue.append(code)
+        else:
+            return
+
+        # Шаги пути раскодируются по одному, когда их забирают
+        for state in self.build_path(parent, goal_code):
+            yield "step", state
+
+    def expander(self):
+        """Функция получения соседей: из готового графа или генерацией переправ"""
+        return self.graph.neighbors if self.graph is not None else self.next_codes
+
+    def build_path(self, parent, goal_code):
+        """Восстанавливает путь от начала до goal_code по словарю родителей"""
+        path = []
+        current = goal_code
+        while current is not None:
+            path.append(current)
+            current = parent[current]
+        path.reverse()
+        return self.decode_path(path)
+
+    def trace_path(self, parent, start_code, goal_code):
+        """Восстанавливает путь по массиву родителей (parent[code] - откуда пришли в code)"""
+        path = [goal_code]
+        current = goal_code
+        while current != start_code:
+            current = parent[current]
+            path.append(current)
+        path.reverse()
+        return self.decode_path(path)
+
+    def record(self, expanded, generated=None, visited=None, peak=0, memory=0):
+        """Итоговые числа поиска в self.stats (если счётчики включены)
+
+        Каждая стратегия вызывает его один раз в конце поиска; generated
+        и visited - None, если стратегия их не ведёт.
+        """
+        if self.stats is not None:
+            self.stats.record(expanded, generated, visited, peak, memory)
+
+    def decode_path(self, codes):
+        """Путь из закодированных состояний; списки раскодируются при обращении (StatePath)"""
+        return StatePath(codes, self.nbits)
+
+    def reachable(self, start, goal):
+        """Проверяет, достижимо ли конечное состояние из начального"""
+        if self.table is not None:
+            return self.table.distance(encode(start), encode(goal)) is not None
+        if self.graph is not None:
+            return self.graph.reachable(encode(start), encode(goal))
+        return bool(self.search_bfs(start, goal))
+
+    def search_bfs(self, start, goal, progress=None):
+        """Поиск в ширину (BFS), возвращает список состояний или пустой список"""
+        if self.table is not None:
+            if self.stats is not None:
+                self.stats.source = "table"  # Поиска не было: путь прочитан из таблицы
+            return self.decode_path(self.table.path_codes(encode(start), encode(goal)))
+        return self._search(start, goal, deque.popleft, progress)
+
+    def search_bfs_numpy(self, start, goal, progress=None):
+        """Поиск в ширину по слоям на NumPy: весь фронт раскрывается сразу
+
+        Фронт - массив кодов в том же порядке, что и очередь search_bfs.
+        Соседи получаются XOR со всеми масками переправ сразу, лишние
+        отсекаются по таблице допустимости и по массиву посещённых, а из
+        повторов остаётся первое вхождение, поэтому путь совпадает с
+        search_bfs. Без NumPy, для задач без общего списка переправ или
+        таблицы допустимости и при склейке одинаковых объектов просто
+        вызывается search_bfs.
+        """
+        if (np is None or self.table is not None or self.moves is None
+                or self.nbits > VALID_TABLE_MAX_BITS or self.classes):
+            return self.search_bfs(start, goal, progress)
+        start_code = encode(start)
+        goal_code = encode(goal)
+        if start_code == goal_code:
+            return self.decode_path([start_code])
+        if self.graph is not None and not self.graph.reachable(start_code, goal_code):
+            return self.decode_path([])
+
+        count = 1 << self.nbits
+        valid = np.frombuffer(bytes(self.valid), dtype=np.bool_)
+        moves = np.array(self.moves, dtype=np.int64)
+        visited = np.zeros(count, dtype=np.bool_)
+        parent = np.zeros(count, dtype=np.uint32)
+        visited[start_code] = True
+
+        frontier = np.array([start_code], dtype=np.int64)
+        rows = max(1, NUMPY_BLOCK // len(moves))
+        expanded = 0
+        generated = 0
+        seen = 1
+        peak = 1
+        memory = visited.nbytes + parent.nbytes
+        while frontier.size:
+            layer = []
+            for i in range(0, frontier.size, rows):
+                block = frontier[i:i + rows, None]
+                # Все, кто в лодке, должны быть на одном берегу с ней
+                side = block & moves
+                children = block ^ moves
+                ok = ((side == 0) | (side == moves)) & valid[children]
+                # Маска выбирает элементы построчно: порядок как у обычной очереди
+                children = children[ok]
+                generated += children.size
+                parents = np.broadcast_to(block, ok.shape)[ok]
+                fresh = ~visited[children]
+                children = children[fresh]
+                parents = parents[fresh]
+                _, first = np.unique(children, return_index=True)
+                first.sort()
+                children = children[first]
+                visited[children] = True
+                parent[children] = parents[first]
+                layer.append(children)
+                seen += children.size
+
+                expanded += block.shape[0]
+                if progress is not None:
+                    progress(expanded, sum(part.size for part in layer))
+                if visited[goal_code]:
+                    self.record(expanded, generated, seen, max(peak, frontier.size), memory)
+                    path = [goal_code]
+                    while path[-1] != start_code:
+                        path.append(int(parent[path[-1]]))
+                    path.reverse()
+                    return self.decode_path(path)
+            frontier = np.concatenate(layer)
+            peak = max(peak, frontier.size)
+
+        self.record(expanded, generated, seen, peak, memory)
+        return self.decode_path([])
+
+    def search_bfs_external(self, start, goal, progress=None):
+        """Поиск в ширину со слоями во временных файлах - для задач, не помещающихся в память
+
+        Путь кратчайший (см. external.external_bfs); в памяти держится
+        только кусок соседей текущего слоя.
+        """
+        start_code = encode(start)
+        goal_code = encode(goal)
+        if start_code != goal_code and not self.valid[goal_code]:
+            return self.decode_path([])
+        return self.decode_path(external_bfs(start_code, goal_code, self.next_codes, progress,
+                                             PROGRESS_INTERVAL, record=self.record))
+
+    def search_bfs_parallel(self, start, goal, progress=None):
+        """Поиск в ширину в self.workers процессах (см. parallel.parallel_bfs), путь как у search_bfs"""
+        from parallel import parallel_bfs  # parallel сам импортирует solver
+        return parallel_bfs(self, start, goal, self.workers, progress)
+
+    def search_dfs(self, start, goal, progress=None):
+        """Поиск в глубину (DFS), возвращает список состояний или пустой список"""
+        return self._search(start, goal, deque.pop, progress)
+
+    def search_bidirectional(self, start, goal, progress=None):
+        """Двунаправленный поиск в ширину: встречные волны от начала и от цели
+
+        Переправы обратимы (человек может отвезти груз обратно), поэтому
+        волна от цели строится теми же переходами. Каждый раз расширяется
+        меньший фронт, а путь получается кратчайшим, как у search_bfs.
+        """
+        start_code = encode(start)
+        goal_code = encode(goal)
+        if start_code == goal_code:
+            return self.decode_path([start_code])
+        # В недопустимое состояние переправой не попасть (и обратной волны из него нет)
+        if not self.valid[goal_code]:
+            return self.decode_path([])
+        if self.graph is not None and not self.graph.reachable(start_code, goal_code):
+            return self.decode_path([])
+        expand = self.expander()
+
+        # Для каждой стороны: родитель (к своему началу) и глубина
+        parent_f, depth_f = {start_code: None}, {start_code: 0}
+        parent_b, depth_b = {goal_code: None}, {goal_code: 0}
+        frontier_f, frontier_b = [start_code], [goal_code]
+        expanded = 0
+        generated = 0
+        peak = 2
+
+        def visited():
+            # Корней два, и каждая волна добавила len - 1 новых состояний; для
+            # SearchStats.duplicates (generated - (visited - 1)) считаем как с одним корнем
+            return len(depth_f) + len(depth_b) - 1
+
+        while frontier_f and frontier_b:
+            forward = len(frontier_f) <= len(frontier_b)
+            if forward:
+                frontier, parent, depth, other = frontier_f, parent_f, depth_f, depth_b
+            else:
+                frontier, parent, depth, other = frontier_b, parent_b, depth_b, depth_f
+
+            # Расширяем целый слой и выбираем лучшую точку встречи в нём
+            meet = None
+            best = None
+            next_frontier = []
+            for current in frontier:
+                expanded += 1
+                if progress is not None and expanded % PROGRESS_INTERVAL == 0:
+                    progress(expanded, len(frontier_f) + len(frontier_b) + len(next_frontier))
+                step = depth[current] + 1
+                neighbors = expand(current)
+                generated += len(neighbors)
+                for code in neighbors:
+                    if code in depth:
+                        continue
+                    parent[code] = current
+                    depth[code] = step
+                    next_frontier.append(code)
+                    if code in other and (best is None or step + other[code] < best):
+                        meet = code
+                        best = step + other[code]
+
+            peak = max(peak, len(frontier_f) + len(frontier_b) - len(frontier) + len(next_frontier))
+            if meet is not None:
+                self.record(expanded, generated, visited(), peak,
+                            sum(sys.getsizeof(d) for d in (parent_f, depth_f, parent_b, depth_b)))
+                # Путь: от начала до точки встречи, затем по родителям обратной волны к цели
+                path = []
+                current = meet
+                while current is not None:
+                    path.append(current)
+                    current = parent_f[current]
+                path.reverse()
+                current = parent_b[meet]
+                while current is not None:
+                    path.append(current)
+                    current = parent_b[current]
+                return self.decode_path(path)
+
+            if forward:
+                frontier_f = next_frontier
+            else:
+                frontier_b = next_frontier
+
+        self.record(expanded, generated, visited(), peak,
+                    sum(sys.getsizeof(d) for d in (parent_f, depth_f, parent_b, depth_b)))
+        return self.decode_path([])
+
+    def heuristic(self, code, goal_code):
+        """Нижняя оценка числа переправ до цели
+
+        Груз, который должен уехать направо, перевозится рейсами слева
+        направо, не больше cargo_limit пассажиров за рейс; так же и налево.
+        Рейсы чередуются, начиная с берега лодки, а чётность числа
+        рейсов определяется тем, на каком берегу лодка должна оказаться.
+        Остальные правила не учитываются, поэтому оценка не завышает.
+        """
+        cargo = self.actors_mask & ~self.boat
+        seats = max(self.cargo_limit, 1)
+        to_right = bin(~code & goal_code & cargo).count("1")
+        to_left = bin(code & ~goal_code & cargo).count("1")
+        trips_right = (to_right + seats - 1) // seats
+        trips_left = (to_left + seats - 1) // seats
+
+        # Первый рейс идёт от берега лодки
+        if code & self.boat:
+            trips_first, trips_second = trips_left, trips_right
+        else:
+            trips_first, trips_second = trips_right, trips_left
+        crossings = max(2 * trips_first - 1, 2 * trips_second, 0)
+        if crossings % 2 != bool((code ^ goal_code) & self.boat):
+            crossings += 1
+        return crossings
+
+    def search_astar(self, start, goal, progress=None):
+        """Поиск A* с оценкой heuristic, путь кратчайший"""
+        start_code = encode(start)
+        goal_code = encode(goal)
+        if not self.valid[goal_code] and start_code != goal_code:
+            return self.decode_path([])
+        if self.graph is not None and not self.graph.reachable(start_code, goal_code):
+            return self.decode_path([])
+        expand = self.expander()
+
+        parent = {start_code: None}
+        cost = {start_code: 0}
+        counter = 0  # Порядок добавления: при равной оценке берётся более раннее состояние
+        heap = [(self.heuristic(start_code, goal_code), 0, counter, start_code)]
+        expanded = 0
+        generated = 0
+        peak = 1
+
+        while heap:
+            _, g, _, current = heapq.heappop(heap)
+            if current == goal_code:
+                self.record(expanded, generated, len(cost), peak,
+                            sys.getsizeof(parent) + sys.getsizeof(cost) + sys.getsizeof(heap))
+                return self.build_path(parent, goal_code)
+            if g > cost[current]:
+                continue  # Устаревшая запись, состояние уже найдено короче
+
+            expanded += 1
+            if progress is not None and expanded % PROGRESS_INTERVAL == 0:
+                progress(expanded, len(heap))
+
+            step = g + 1
+            neighbors = expand(current)
+            generated += len(neighbors)
+            for code in neighbors:
+                if code not in cost or step < cost[code]:
+                    cost[code] = step
+                    parent[code] = current
+                    counter += 1
+                    heapq.heappush(heap, (step + self.heuristic(code, goal_code), step, counter, code))
+            if len(heap) > peak:
+                peak = len(heap)
+
+        self.record(expanded, generated, len(cost), peak,
+                    sys.getsizeof(parent) + sys.getsizeof(cost) + sys.getsizeof(heap))
+        return self.decode_path([])
+
+    def search_idastar(self, start, goal, progress=None):
+        """Поиск IDA*: углубление по порогу оценки, память - только текущий путь
+
+        Повторы на текущем пути отсекаются, поэтому поиск всегда конечен;
+        без готового графа недостижимая цель может проверяться долго.
+        """
+        start_code = encode(start)
+        goal_code = encode(goal)
+        if not self.valid[goal_code] and start_code != goal_code:
+            return self.decode_path([])
+        if self.graph is not None and not self.graph.reachable(start_code, goal_code):
+            return self.decode_path([])
+        expand = self.expander()
+        heuristic = self.heuristic
+
+        threshold = heuristic(start_code, goal_code)
+        expanded = 0
+        generated = 0
+        peak = 1  # Для IDA* фронт - текущий путь
+        while True:
+            path = [start_code]
+            on_path = {start_code}
+            # Стек итераторов по соседям: глубина стека равна длине пути
+            neighbors = expand(start_code)
+            generated += len(neighbors)
+            stack = [iter(neighbors)]
+            exceeded = None  # Наименьшая оценка, превысившая порог
+
+            while stack:
+                if path[-1] == goal_code:
+                    self.record(expanded, generated, peak=peak)
+                    return self.decode_path(path)
+                code = next(stack[-1], None)
+                if code is None:
+                    stack.pop()
+                    on_path.discard(path.pop())
+                    continue
+                if code in on_path:
+                    continue
+                estimate = len(path) + heuristic(code, goal_code)
+                if estimate > threshold:
+                    if exceeded is None or estimate < exceeded:
+                        exceeded = estimate
+                    continue
+                path.append(code)
+                on_path.add(code)
+                neighbors = expand(code)
+                generated += len(neighbors)
+                stack.append(iter(neighbors))
+                if len(path) > peak:
+                    peak = len(path)
+                expanded += 1
+                if progress is not None and expanded % PROGRESS_INTERVAL == 0:
+                    progress(expanded, len(path))
+
+            if exceeded is None:
+                self.record(expanded, generated, peak=peak)
+                return self.decode_path([])
+            threshold = exceeded
+
+    def solve(self, strategy, start, goal, progress=None):
+        """Запускает поиск по имени стратегии (см. STRATEGIES)
+
+        Сначала решение ищется среди последних MEMO_SIZE решений в памяти,
+        затем в кеше на диске (если он задан), и только потом поиском.
+        Если включён instrument, счётчики поиска остаются в self.stats.
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Неизвестная стратегия поиска: {strategy}")
+        stats = self.stats = SearchStats(strategy) if self.instrument else None
+        timed = stats.phase if stats is not None else _untimed
+        if stats is not None:
+            progress = self._tracked(progress, stats)
+
+        with timed("lookup"):
+            start_code = encode(start)
+            goal_code = encode(goal)
+            # Версия правил в ключе: поиск, закончившийся после смены правил, не испортит память
+            key = (strategy, start_code, goal_code, self.symmetry, self.rules_version)
+            codes = self.memo.get(key)
+            if codes is not None:
+                self.memo.move_to_end(key)
+                self.memo_hits += 1
+                source = "memo"
+            else:
+                self.memo_misses += 1
+                rules = rules_digest(self) if self.cache is not None else None
+                codes = self.cache.get(rules, strategy, start_code, goal_code) if rules else None
+                if codes is not None:
+                    self.memo[key] = array('Q', codes)
+                source = "cache"
+
+        if codes is not None:
+            path = self.decode_path(array('Q', codes))
+        else:
+            with timed("search"):
+                path = getattr(self, STRATEGIES[strategy])(start, goal, progress)
+            with timed("store"):
+                if rules:
+                    self.cache.put(rules, strategy, start_code, goal_code, path.codes)
+                self.memo[key] = array('Q', path.codes)
+        if len(self.memo) > MEMO_SIZE:
+            self.memo.popitem(last=False)
+
+        if stats is not None:
+            if codes is not None:
+                stats.source = source
+            stats.path_length = len(path) - 1 if path else None
+        return path
+
+    @staticmethod
+    def _tracked(progress, stats):
+        """Обёртка над progress, которая заодно запоминает ход поиска в stats"""
+        def tracked(expanded, frontier):
+            stats.sample(expanded, frontier)
+            if progress is not None:
+                progress(expanded, frontier)
+        return tracked
@@ -0,0 +1,102 @@
+import json
+import time
+from contextlib import contextmanager
+
+
+# Откуда взят путь без поиска -> как это показать
+SOURCES = {
+    "memo": "из памяти решений",
+    "cache": "из кеша на диске",
+    "table": "из таблицы путей",
+}
+
+
+class SearchStats:
+    """Счётчики одного поиска: раскрыто, отброшено повторов, пик фронта, память, время этапов
+
+    Каждая стратегия в конце поиска передаёт точные итоги в record
+    (Solver.record); пока поиск идёт, sample обновляет их по сообщениям
+    о ходе работы. Пик фронта стратегии замеряют после каждого раскрытия
+    (волны - после каждого слоя).
+    """
+
+    def __init__(self, strategy):
+        self.strategy = strategy
+        self.source = "search"  # Откуда путь: search или один из SOURCES
+        self.expanded = 0  # Раскрыто состояний
+        self.generated = None  # Получено соседей (если обход их считает)
+        self.visited = None  # Посещено разных состояний
+        self.peak_frontier = 0  # Наибольший размер очереди / стека / фронта
+        self.memory = 0  # Байт под посещённые и родителей
+        self.path_length = None
+        self.phases = {}  # Этап -> секунды
+
+    @property
+    def duplicates(self):
+        """Соседи, отброшенные как уже посещённые"""
+        if self.generated is None or self.visited is None:
+            return None
+        return self.generated - (self.visited - 1)
+
+    @contextmanager
+    def phase(self, name):
+        """Замеряет время этапа (повторные замеры одного этапа складываются)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    def sample(self, expanded, frontier):
+        """Сообщение о ходе работы поиска"""
+        self.expanded = max(self.expanded, expanded)
+        self.peak_frontier = max(self.peak_frontier, frontier)
+
+    def record(self, expanded, generated, visited, peak_frontier, memory):
+        """Итоговые точные числа от обхода"""
+        self.expanded = expanded
+        self.generated = generated
+        self.visited = visited
+        self.peak_frontier = max(self.peak_frontier, peak_frontier)
+        self.memory = memory
+
+    @property
+    def total_time(self):
+        return sum(self.phases.values())
+
+    def to_dict(self):
+        return {
+            "strategy": self.strategy,
+            "source": self.source,
+            "expanded": self.expanded,
+            "generated": self.generated,
+            "duplicates": self.duplicates,
+            "visited": self.visited,
+            "peak_frontier": self.peak_frontier,
+            "memory_bytes": self.memory,
+            "path_length": self.path_length,
+            "phases": {name: round(seconds, 6) for name, seconds in self.phases.items()},
+            "expanded_per_second": round(self.expanded / self.phases["search"])
+            if self.phases.get("search") else None,
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+
+    def save(self, filename):
+        """Сохраняет счётчики в JSON"""
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write(self.to_json())
+
+    def summary(self):
+        """Короткая строка для строки состояния"""
+        if self.source != "search":
+            return f"{self.strategy}: {SOURCES[self.source]}, {self.total_time * 1000:.1f} мс"
+        parts = [f"{self.strategy}: раскрыто {self.expanded}"]
+        if self.duplicates is not None:
+            parts.append(f"повторов {self.duplicates}")
+        parts.append(f"пик фронта {self.peak_frontier}")
+        if self.memory:
+            parts.append(f"память {self.memory / 1024:.1f} КБ")
+        parts.append(f"{self.total_time * 1000:.1f} мс")
+        return ", ".join(parts)
@@ -0,0 +1,91 @@
+def interchangeable_classes(solver):
+    """Группы взаимозаменяемых объектов (например, волк 1 и волк 2)
+
+    Объекты взаимозаменяемы, если у них одни и те же конфликты (не считая
+    друг друга) и одинаковая роль: оба гребцы или оба нет. Гребец, за
+    которым закреплена лодка, всегда один в своей группе. Возвращаются
+    только группы из двух и более объектов.
+    """
+    conflicts = solver.rules.conflicts
+    classes = []
+    for actor in range(solver.size):
+        bit = 1 << actor
+        if bit == solver.boat:
+            continue
+        for members in classes:
+            if all(_swappable(solver, conflicts, actor, other) for other in members):
+                members.append(actor)
+                break
+        else:
+            classes.append([actor])
+    return [members for members in classes if len(members) > 1]
+
+
+def _swappable(solver, conflicts, a, b):
+    """Можно ли поменять объекты a и b местами, не изменив правил"""
+    if bool(solver.rowers_mask >> a & 1) != bool(solver.rowers_mask >> b & 1):
+        return False
+    return conflicts[a] & ~(1 << b) == conflicts[b] & ~(1 << a)
+
+
+class Symmetry:
+    """Канонизация состояний по группам взаимозаменяемых объектов
+
+    Состояние заменяется представителем, в котором внутри каждой группы
+    на правом берегу стоят объекты с наименьшими номерами, то есть важно
+    только, сколько объектов группы на каком берегу. Группы дополнительно
+    делятся по берегу в начальном состоянии: тогда любая перестановка
+    внутри группы оставляет начало на месте, и найденный путь можно
+    переставить так, чтобы он пришёл точно в цель.
+    """
+
+    def __init__(self, classes, start_code):
+        self.groups = []
+        for members in classes:
+            for bank in (0, 1):
+                part = [m for m in members if (start_code >> m & 1) == bank]
+                if len(part) > 1:
+                    self.groups.append(part)
+
+        # Для каждой группы: её маска и маски "первых count объектов"
+        self.masks = []
+        for members in self.groups:
+            mask = 0
+            fills = [0]
+            for member in members:
+                mask |= 1 << member
+                fills.append(mask)
+            self.masks.append((mask, fills))
+
+    def __bool__(self):
+        return bool(self.groups)
+
+    def canon(self, code):
+        """Канонический представитель состояния"""
+        for mask, fills in self.masks:
+            code = (code & ~mask) | fills[bin(code & mask).count("1")]
+        return code
+
+    def align(self, path, goal_code):
+        """Переставляет объекты внутри групп по всему пути так, чтобы он закончился в goal_code"""
+        last = path[-1]
+        mapping = []  # (откуда, куда) для каждого объекта групп
+        for members in self.groups:
+            for bank in (0, 1):
+                sources = [m for m in members if (last >> m & 1) == bank]
+                targets = [m for m in members if (goal_code >> m & 1) == bank]
+                mapping.extend(zip(sources, targets))
+        if all(source == target for source, target in mapping):
+            return path
+
+        moved = 0
+        for source, _ in mapping:
+            moved |= 1 << source
+        aligned = []
+        for code in path:
+            new_code = code & ~moved
+            for source, target in mapping:
+                if code >> source & 1:
+                    new_code |= 1 << target
+            aligned.append(new_code)
+        return aligned
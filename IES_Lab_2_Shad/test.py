@@ -2,10 +2,12 @@ import sys
 from time import sleep
 from PySide6.QtWidgets import (QApplication, QMainWindow, QMessageBox)
 from PySide6.QtCore import QRect, QTimer, Qt
-from PySide6.QtGui import QStandardItemModel, QStandardItem, QTransform, QPixmap
+from PySide6.QtGui import QStandardItemModel, QStandardItem, QTextCursor, QTransform, QPixmap
 import random
 
 from int2 import Ui_MainWindow
+from puzzle import ACTORS, Puzzle, log_rows
+from solver import Solver
 
 
 class MainWindow(QMainWindow):
@@ -16,6 +18,8 @@ class MainWindow(QMainWindow):
         self._start = [0, 0, 0, 0, 0, 0]  # человек, коза, капуста, волк 1, волк 2, собака
         self._goal = [1, 1, 1, 1, 1, 1]  # 0 - левый берег, 1 - правый берег
         self.states = []  # Будет хранить последовательность состояний
+        # Коза не остаётся с волками, капустой и собакой, собака - с волками
+        self.solver = Solver(Puzzle(ACTORS, [(1, 2), (1, 3), (1, 4), (1, 5), (3, 5), (4, 5)]))
 
         # Создание UI
         self.ui = Ui_MainWindow()
@@ -88,22 +92,15 @@ class MainWindow(QMainWindow):
         self.current_state_index = 0
         self.timer.start(500)  # 500 ms = 0.5 секунды
         self.ui.textEdit.setText('Человек\tКоза\tКапуста\tВолк\n\n')
+        self.start_log()
 
     def update_position(self):
         """Обновляет позиции объектов на форме"""
         if self.current_state_index < len(self.states):
             state = self.states[self.current_state_index]
-            nameState = []
-            for i in state:
-                if i == 0:
-                    nameState.append("Левый")
-                else:
-                    nameState.append("Правый")
-
-            # Добавляем текущее состояние в текстовое поле
-            curTxt = self.ui.textEdit.toPlainText()
-            newTxt = curTxt + "\t".join(nameState) + "\n"
-            self.ui.textEdit.setText(newTxt)
+
+            # Дописываем готовую строку в конец журнала, не перерисовывая весь текст
+            self.log_cursor.insertText(self.log_rows[self.current_state_index])
 
             # Перемещение лодки и человека
             if state[0] == 1 and self.ui.boat.geometry().x() == 180:
@@ -133,6 +130,12 @@ class MainWindow(QMainWindow):
         else:
             self.timer.stop()
 
+    def start_log(self):
+        """Готовит строки журнала для найденного пути и курсор в конце текста"""
+        self.log_rows = log_rows(self.states)
+        self.log_cursor = QTextCursor(self.ui.textEdit.document())
+        self.log_cursor.movePosition(QTextCursor.MoveOperation.End)
+
     def mirror_pixmap(self, widget):
         """Отражает изображение виджета по горизонтали"""
         pixmap = widget.pixmap()
@@ -146,17 +149,6 @@ class MainWindow(QMainWindow):
         self.states = [current.copy()]
         max_iterations = 1000  # Ограничение на количество итераций
 
-        def is_valid_state(state):
-            # Проверяем, что коза не осталась с волком или капустой без человека
-            if (state[1] == state[3] and state[0] != state[1]) or \
-                    (state[1] == state[2] and state[0] != state[1]) or \
-                    (state[1] == state[4] and state[0] != state[1]) or \
-                    (state[1] == state[5] and state[0] != state[1]) or \
-                    (state[3] == state[5] and state[0] != state[5]) or \
-                    (state[4] == state[5] and state[0] != state[5]):
-                return False
-            return True
-
         for _ in range(max_iterations):
             if current == self._goal:
                 break
@@ -173,7 +165,7 @@ class MainWindow(QMainWindow):
                 new_state[item_to_move] = new_state[0]
 
             # Проверяем новое состояние
-            if is_valid_state(new_state) and new_state not in self.states:
+            if self.solver.is_valid_state(new_state) and new_state not in self.states:
                 current = new_state.copy()
                 self.states.append(current.copy())
             else:
@@ -1,9 +1,15 @@
 import sys
 from PySide6.QtWidgets import (QApplication, QMainWindow, QMessageBox)
-from PySide6.QtCore import QRect, QTimer, Qt
-from PySide6.QtGui import QStandardItemModel, QStandardItem, QTransform, QPixmap
+from PySide6.QtCore import QPoint, QRect, QTimer, Qt
+from PySide6.QtGui import QStandardItemModel, QStandardItem, QTextCursor, QTransform, QPixmap
 
 from int2 import Ui_MainWindow
+from puzzle import ACTORS, Puzzle, log_rows
+from solver import Solver
+
+# Координаты x объектов и лодки на левом и правом берегу
+BANK_X = (100, 430)
+BOAT_X = (180, 270)
 
 
 class MainWindow(QMainWindow):
@@ -14,6 +20,9 @@ class MainWindow(QMainWindow):
         self._start = [0, 0, 0, 0, 0, 0]  # человек, коза, капуста, волк 1, волк 2, собака
         self._goal = [1, 1, 1, 1, 1, 1]  # 0 - левый берег, 1 - правый берег
         self.states = []  # Будет хранить последовательность состояний
+        # Упрощённые правила: коза + волк, коза + капуста; в лодке один предмет.
+        # Человек сначала пробует плыть один, затем с предметами по порядку
+        self.solver = Solver(Puzzle(ACTORS, [(1, 2), (1, 3)], capacity=1, solo_first=True))
 
         # Создание UI
         self.ui = Ui_MainWindow()
@@ -27,6 +36,9 @@ class MainWindow(QMainWindow):
         self.timer.timeout.connect(self.update_position)
         self.current_state_index = 0
 
+        # Картинки и координаты спрайтов
+        self.init_sprites()
+
         # Инициализация таблиц
         self.init_tables()
 
@@ -93,174 +105,59 @@ class MainWindow(QMainWindow):
         self.current_state_index = 0
         self.timer.start(500)  # 500 ms = 0.5 секунды
         self.ui.textEdit.setText('Человек\tКоза\tКапуста\tВолк1\tВолк2\tСобака\n\n')
+        self.start_log()
 
     def update_position(self):
         """Обновляет позиции объектов на форме"""
         if self.current_state_index < len(self.states):
             state = self.states[self.current_state_index]
-            nameState = []
-            for i in state:
-                if i == 0:
-                    nameState.append("Левый")
-                else:
-                    nameState.append("Правый")
-
-            # Добавляем текущее состояние в текстовое поле
-            curTxt = self.ui.textEdit.toPlainText()
-            newTxt = curTxt + "\t".join(nameState) + "\n"
-            self.ui.textEdit.setText(newTxt)
-
-            # Перемещение лодки и человека
-            if state[0] == 1 and self.ui.boat.geometry().x() == 180:
-                self.ui.boat.move(270, self.ui.boat.geometry().y())
-                self.ui.man.move(430, self.ui.man.geometry().y())
-                self.mirror_pixmap(self.ui.boat)
-                self.mirror_pixmap(self.ui.man)
-            elif state[0] == 0 and self.ui.boat.geometry().x() == 270:
-                self.ui.boat.move(180, self.ui.boat.geometry().y())
-                self.ui.man.move(100, self.ui.man.geometry().y())
-                self.mirror_pixmap(self.ui.boat)
-                self.mirror_pixmap(self.ui.man)
-
-            # Перемещение остальных объектов
-            objects = [None, self.ui.goat, self.ui.cabbage, self.ui.wolf, self.ui.wolf2, self.ui.dog]
-
-            for i in range(1, 6):  # Обрабатываем все 5 объектов
-                obj = objects[i]
-                if state[i] == 1 and obj.geometry().x() == 100:
-                    obj.move(430, obj.geometry().y())
-                    self.mirror_pixmap(obj)
-                elif state[i] == 0 and obj.geometry().x() == 430:
-                    obj.move(100, obj.geometry().y())
-                    self.mirror_pixmap(obj)
+
+            # Дописываем готовую строку в конец журнала, не перерисовывая весь текст
+            self.log_cursor.insertText(self.log_rows[self.current_state_index])
+
+            # Перемещение спрайтов: только подстановка готовых картинок и координат
+            for i, (widget, actor, positions, pixmaps) in enumerate(self.sprites):
+                bank = state[actor]
+                if bank != self.sprite_banks[i]:
+                    widget.setPixmap(pixmaps[bank])
+                    widget.move(positions[bank])
+                    self.sprite_banks[i] = bank
 
             self.current_state_index += 1
         else:
             self.timer.stop()
 
-    def mirror_pixmap(self, widget):
-        """Отражает изображение виджета по горизонтали"""
-        pixmap = widget.pixmap()
-        if pixmap:
-            mirrored = pixmap.transformed(QTransform().scale(-1, 1))
-            widget.setPixmap(mirrored)
-
-    def is_valid_state(self, state):
-        """Проверяет, является ли состояние допустимым"""
-        # Коза не должна оставаться с волком без человека
-        # Пример для: коза + волк, коза + капуста, волк + собака и т.д.
-        # forbidden_pairs = [
-        #     (1, 3),  # Коза + волк 1
-        #     (1, 4),  # Коза + волк 2
-        #     (1, 2),  # Коза + капуста
-        #     (3, 5),  # Волк 1 + собака
-        #     (4, 5)  # Волк 2 + собака
-        # ]
-        # for (a, b) in forbidden_pairs:
-        #     if state[a] == state[b] and state[0] != state[a]:
-        #         return False
-
-        # if (state[1] == state[3] and state[0] != state[1]) or \
-        #         (state[1] == state[2] and state[0] != state[1]) or \
-        #         (state[1] == state[4] and state[0] != state[1]) or \
-        #         (state[1] == state[5] and state[0] != state[1]) or \
-        #         (state[3] == state[5] and state[0] != state[5]) or \
-        #         (state[4] == state[5] and state[0] != state[5]):
-        #     return False
-
-        if (state[1] == state[3] and state[0] != state[1]):
-            return False
-        if (state[1] == state[2] and state[0] != state[1]):
-            return False
-        # if (state[1] == state[4] and state[0] != state[1]):
-        #     return False
-        # if (state[1] == state[5] and state[0] != state[1]):
-        #     return False
-        # if (state[3] == state[5] and state[0] != state[5]):
-        #     return False
-        # if (state[4] == state[5] and state[0] != state[5]):
-        #     return False
-
-
-        return True
-
-    def generate_next_states(self, current_state):
-        """Генерирует все возможные следующие допустимые состояния"""
-        next_states = []
-        # Определяем на каком берегу находится человек
-        man_pos = current_state[0]
-
-        # Варианты перемещения: ничего, коза, капуста, волк
-        for item in [0, 1, 2, 3, 4, 5]:
-            new_state = current_state.copy()
-            new_state[0] = 1 - man_pos  # Меняем положение человека
-
-            print(new_state)
-
-            # Если перемещаем предмет, меняем и его положение
-            if item != 0:
-                # Предмет должен быть на том же берегу, что и человек
-                if new_state[item] == man_pos:
-                    new_state[item] = 1 - man_pos
-                else:
-                    continue  # Пропускаем недопустимые перемещения
-
-            # Проверяем допустимость нового состояния
-            if self.is_valid_state(new_state):
-                next_states.append(new_state)
-        return next_states
-
-    def search(self):
-        """Реализация поиска в глубину (DFS)"""
-        visited = set()
-        stack = []
-        parent = {}
-
-        if not self.is_valid_state(self._start) or not self.is_valid_state(self._goal):
-            self.show_error("Начальное или конечное состояние недопустимо!")
-
-        # Преобразуем списки в кортежи для хранения в множестве
-        start_tuple = tuple(self._start)
-        goal_tuple = tuple(self._goal)
-
-        stack.append(start_tuple)
-        visited.add(start_tuple)
-        parent[start_tuple] = None
-
-        found = False
-        current_tuple = None
+    def start_log(self):
+        """Готовит строки журнала для найденного пути и курсор в конце текста"""
+        self.log_rows = log_rows(self.states)
+        self.log_cursor = QTextCursor(self.ui.textEdit.document())
+        self.log_cursor.movePosition(QTextCursor.MoveOperation.End)
 
-        # count = 0
+    def init_sprites(self):
+        """Запоминает для каждого спрайта картинки и координаты на обоих берегах"""
+        # Спрайт и номер объекта в состоянии; лодка ездит вместе с человеком
+        sprites = [(self.ui.man, 0), (self.ui.goat, 1), (self.ui.cabbage, 2),
+                   (self.ui.wolf, 3), (self.ui.wolf2, 4), (self.ui.dog, 5), (self.ui.boat, 0)]
 
-        while stack:
+        self.sprites = []
+        for widget, actor in sprites:
+            bank_x = BOAT_X if widget is self.ui.boat else BANK_X
+            y = widget.geometry().y()
+            positions = (QPoint(bank_x[0], y), QPoint(bank_x[1], y))
 
-            # count += 1
-            # print(f"{count}: {stack}")
-            current_tuple = stack.pop()
+            # На правом берегу картинка отражена по горизонтали
+            pixmap = widget.pixmap()
+            mirrored = pixmap if pixmap.isNull() else pixmap.transformed(QTransform().scale(-1, 1))
+            self.sprites.append((widget, actor, positions, (pixmap, mirrored)))
 
-            if current_tuple == goal_tuple:
-                found = True
-                break
-
-            # Генерируем следующие состояния
-            next_states = self.generate_next_states(list(current_tuple))
-            for state in next_states:
-                state_tuple = tuple(state)
-                if state_tuple not in visited:
-                    visited.add(state_tuple)
-                    parent[state_tuple] = current_tuple
-                    stack.append(state_tuple)
+        self.sprite_banks = [0] * len(self.sprites)  # Сначала все спрайты на левом берегу
 
+    def search(self):
+        """Реализация поиска в глубину (DFS)"""
+        if not self.solver.is_valid_state(self._start) or not self.solver.is_valid_state(self._goal):
+            self.show_error("Начальное или конечное состояние недопустимо!")
 
-        # Восстанавливаем путь
-        self.states = []
-        if found:
-            path = []
-            current_tuple = goal_tuple
-            while current_tuple is not None:
-                path.append(list(current_tuple))
-                current_tuple = parent[current_tuple]
-            self.states = path[::-1]  # Разворачиваем путь, чтобы получить от начала до конца
+        self.states = self.solver.search_dfs(self._start, self._goal)
 
 
 if __name__ == "__main__":
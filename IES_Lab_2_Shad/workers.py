@@ -0,0 +1,70 @@
+import threading
+
+from PySide6.QtCore import QObject, QRunnable, Signal, Slot
+
+from parallel import race
+from solver import SearchCancelled
+
+
+class SearchSignals(QObject):
+    """Сигналы фонового поиска (QRunnable сам сигналы отправлять не умеет)"""
+    progress = Signal(int, int)  # Раскрыто состояний, размер фронта
+    finished = Signal(object)  # Найденный путь (список состояний, может быть пустым)
+    failed = Signal(str)  # Текст ошибки
+    cancelled = Signal()
+
+
+class SearchWorker(QRunnable):
+    """Поиск решения в пуле потоков, чтобы окно не зависало"""
+
+    def __init__(self, solver, strategy, start, goal):
+        super().__init__()
+        self.solver = solver
+        self.strategy = strategy
+        self.start = list(start)
+        self.goal = list(goal)
+        self.winner = strategy  # Стратегия, чей путь получен
+        self.signals = SearchSignals()
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        """Просит поиск остановиться при следующем сообщении о ходе работы"""
+        self._cancel.set()
+
+    def report(self, expanded, frontier):
+        """Передаёт ход поиска в окно и прерывает поиск, если нажата отмена"""
+        if self._cancel.is_set():
+            raise SearchCancelled()
+        self.signals.progress.emit(expanded, frontier)
+
+    def search(self):
+        """Сам поиск; выполняется в потоке пула"""
+        return self.solver.solve(self.strategy, self.start, self.goal, progress=self.report)
+
+    @Slot()
+    def run(self):
+        try:
+            states = self.search()
+        except SearchCancelled:
+            self.signals.cancelled.emit()
+            return
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        if self._cancel.is_set():
+            self.signals.cancelled.emit()
+        else:
+            self.signals.finished.emit(states)
+
+
+class RaceWorker(SearchWorker):
+    """Гонка нескольких стратегий в отдельных процессах (см. parallel.race)"""
+
+    def __init__(self, solver, start, goal, optimal=False):
+        super().__init__(solver, "race", start, goal)
+        self.optimal = optimal
+
+    def search(self):
+        self.winner, states = race(self.solver, self.start, self.goal, optimal=self.optimal,
+                                   progress=self.report)
+        return states